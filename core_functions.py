@@ -1,10 +1,33 @@
-import os, subprocess, cv2, random, tempfile, shutil
+import os, subprocess, cv2, random, tempfile, shutil, json
+import asyncio
+import logging
+import re
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+import numpy as np
 from typing import Optional, List
+from functools import lru_cache, partial
+from pathlib import Path
 from datetime import datetime
-from moviepy import VideoFileClip, ImageClip, CompositeVideoClip, AudioFileClip
+from moviepy import VideoFileClip, ImageClip, CompositeVideoClip
 from moviepy.video.fx import Crop
+from PIL import Image
 
 which_ubuntu = 'RunPod'
+# Whether GPU detection is on by default, read once since the environment is fixed per process
+RUNPOD_ENV = which_ubuntu == 'RunPod' or bool(os.environ.get('RUNPOD_POD_ID'))
+
+logger = logging.getLogger(__name__)
+
+# [Script Info] section, and the [V4+ Styles] header + Format line followed by its
+# Style: lines, of a converted ASS file (portrait restyle), matched on the raw bytes
+_SCRIPT_INFO_RE = re.compile(rb'\[Script Info\][^\[]*')
+_ASS_STYLES_RE = re.compile(rb'(\[V4\+ Styles\][^\[]*?Format:[^\n]*\n)((?:Style:[^\n]*(?:\n|$))*)')
+
+# Spaces and parentheses are stripped from generated output filenames in one pass
+_FILENAME_TRANS = str.maketrans({" ": "_", "(": None, ")": None})
 
 
 def get_output_filename(prefix, input_path, output_ext=".mp4"):
@@ -29,14 +52,25 @@ def get_output_filename(prefix, input_path, output_ext=".mp4"):
     output_filename = f"{prefix}_{base_name}_{timestamp}{output_ext}"
     
     # Clean up any spaces or special characters
-    output_filename = output_filename.replace(" ", "_").replace("(", "").replace(")", "")
+    output_filename = output_filename.translate(_FILENAME_TRANS)
     
     return output_filename
 
 
+@lru_cache(maxsize=1)
+def _fc_list_families():
+    """Output of `fc-list :family`, run once per process (installed fonts do not change)"""
+    try:
+        return subprocess.run(['fc-list', ':family'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True).stdout
+    except Exception:
+        return ""
+
+
+@lru_cache(maxsize=4)
 def get_local_font(language='chinese'):
     """
     Get appropriate font name based on environment and language
+    The result is cached per language
     
     Args:
         language (str): Language type, 'chinese' (default) or 'english'
@@ -44,7 +78,6 @@ def get_local_font(language='chinese'):
     Returns:
         str: Font name or font file path
     """
-    import subprocess
     if language.lower() == 'english':
         # Use Ubuntu font for English
         font_name = "Ubuntu"
@@ -54,13 +87,9 @@ def get_local_font(language='chinese'):
         if which_ubuntu in ['TB', 'AWS', 'RunPod']:
             # Linux systems - check if LXGW WenKai is installed
             
-            try:
-                result = subprocess.run(['fc-list', ':family'], capture_output=True, text=True)
-                if 'LXGW WenKai' in result.stdout:
-                    # System has installed font, return font name (not path)
-                    return "LXGW WenKai Bold"
-            except:
-                pass
+            if 'LXGW WenKai' in _fc_list_families():
+                # System has installed font, return font name (not path)
+                return "LXGW WenKai Bold"
             
             # Check if font files exist
             font_paths = [
@@ -87,14 +116,11 @@ def get_local_font(language='chinese'):
         else:
             # Mac systems - also prioritize LXGW WenKai
             # First check if system has LXGW WenKai installed
-            try:
-                result = subprocess.run(['fc-list', ':family'], capture_output=True, text=True)
-                if 'LXGW WenKai' in result.stdout or 'LXGW' in result.stdout:
-                    # System has installed font, use font name directly
-                    font_name = "LXGW WenKai"
-                    return font_name
-            except:
-                pass
+            font_families = _fc_list_families()
+            if 'LXGW WenKai' in font_families or 'LXGW' in font_families:
+                # System has installed font, use font name directly
+                font_name = "LXGW WenKai"
+                return font_name
             
             # If system doesn't have it, check local font files
             mac_font_paths = [
@@ -119,11 +145,323 @@ def get_local_font(language='chinese'):
 
 
 EFFECTS = ["random", "zoom_in", "zoom_out", "pan_left", "pan_right"]
+# Candidates for the "random" effect
+_NON_RANDOM_EFFECTS = tuple(e for e in EFFECTS if e != "random")
+
+# Intermediate videos go to this RAM-backed directory while it has SCRATCH_MIN_FREE_BYTES
+# free (Docker's default /dev/shm is only 64MB), to the system temp directory otherwise
+SCRATCH_DIR = os.environ.get('SCRATCH_DIR') or '/dev/shm/vgen'
+SCRATCH_MIN_FREE_BYTES = 1024 ** 3
+
+
+def _scratch_dir():
+    """
+    Directory for one intermediate video, checked per file so a filling tmpfs
+    falls back to disk; None means the system temp directory
+    """
+    try:
+        # mkdir, not makedirs: a missing /dev/shm must not be created on /dev
+        os.mkdir(SCRATCH_DIR)
+    except FileExistsError:
+        pass
+    except OSError:
+        return None
+    try:
+        st = os.statvfs(SCRATCH_DIR)
+    except (OSError, AttributeError):
+        return None
+    return SCRATCH_DIR if st.f_bavail * st.f_frsize >= SCRATCH_MIN_FREE_BYTES else None
+
+
+# FFmpeg video encoder arguments for the subtitle burn-in passes
+NVENC_ENCODE_ARGS = ["-c:v", "h264_nvenc", "-preset", "p4", "-cq:v", "19"]
+X264_ENCODE_ARGS = ["-c:v", "libx264", "-preset", "medium", "-crf", "23"]
+# NVENC arguments for a still image source: no motion, so the fastest preset with
+# no lookahead or B-frames gives the same quality
+NVENC_STILL_IMAGE_ARGS = ["-preset", "p1", "-tune", "ll", "-rc", "vbr", "-cq", "23", "-b:v", "0", "-bf", "0"]
+
+# Frames buffered between the reader, transform and writer threads
+PIPELINE_PREFETCH = 8
+
+
+def _frame_ring(shape, prefetch=PIPELINE_PREFETCH):
+    """
+    Preallocated output buffers for a _run_frame_pipeline transform, used round-robin.
+    Frame i may reuse the buffer of frame i - (prefetch + 2): by then it has left the
+    write queue (prefetch frames) and the writer (one frame).
+    """
+    return [np.empty(shape, dtype=np.uint8) for _ in range(prefetch + 2)]
+
+
+def _run_frame_pipeline(cap, writer, transform, total_frames, prefetch=PIPELINE_PREFETCH):
+    """
+    Decode, transform and encode frames on three threads joined by bounded queues,
+    so cap.read() and writer.write() overlap with the per-frame transform.
+    
+    Args:
+        cap: cv2.VideoCapture to read from (read on a reader thread)
+        writer: Object with write(frame) (written on a writer thread)
+        transform: Callable(index, frame) -> frame, run on the calling thread
+        total_frames: Maximum number of frames to process
+        prefetch: Capacity of each queue
+    """
+    read_q = queue.Queue(maxsize=prefetch)
+    write_q = queue.Queue(maxsize=prefetch)
+    stop = threading.Event()
+    errors = []
+
+    def read_frames():
+        try:
+            for _ in range(total_frames):
+                if stop.is_set():
+                    break
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                read_q.put(frame)
+        except Exception as e:
+            errors.append(e)
+        finally:
+            read_q.put(None)
+
+    def write_frames():
+        try:
+            while (frame := write_q.get()) is not None:
+                writer.write(frame)
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+            # Keep draining so the transform never blocks on a full queue
+            while write_q.get() is not None:
+                pass
+
+    reader = threading.Thread(target=read_frames, daemon=True)
+    writer_thread = threading.Thread(target=write_frames, daemon=True)
+    reader.start()
+    writer_thread.start()
+    try:
+        i = 0
+        while (frame := read_q.get()) is not None:
+            if not stop.is_set():
+                write_q.put(transform(i, frame))
+            i += 1
+    except Exception:
+        stop.set()
+        # Unblock the reader if it is waiting on a full queue
+        while read_q.get() is not None:
+            pass
+        raise
+    finally:
+        write_q.put(None)
+        reader.join()
+        writer_thread.join()
+    if errors:
+        raise errors[0]
+
+
+def _aspect_crop_size(w, h):
+    """
+    Largest centered 16:9 (landscape) or 9:16 (portrait) window of a w x h frame,
+    rounded down to even dimensions for yuv420p
+    """
+    aspect = 16 / 9 if w > h else 9 / 16
+    if abs(w / h - aspect) <= 0.01:
+        crop_w, crop_h = w, h
+    elif w / h > aspect:
+        crop_w, crop_h = int(h * aspect), h
+    else:
+        crop_w, crop_h = w, int(w / aspect)
+    return crop_w - crop_w % 2, crop_h - crop_h % 2
+
+
+def _open_capture(input_path):
+    """
+    Open a video for frame-by-frame reading, with hardware decoding through OpenCV's
+    FFmpeg backend when the build supports it (OpenCV 4.5.2+), software otherwise
+    """
+    try:
+        cap = cv2.VideoCapture(input_path, cv2.CAP_FFMPEG, [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY])
+        if cap.isOpened():
+            return cap
+        cap.release()
+    except (AttributeError, TypeError, cv2.error):
+        # Older OpenCV without the constants or the params overload
+        pass
+    return cv2.VideoCapture(input_path)
+
+
+def _probe_duration(media_path):
+    """Container duration in seconds read by ffprobe (no decoding), None if unknown"""
+    try:
+        output = subprocess.check_output(
+            ['ffprobe', '-hide_banner', '-v', 'quiet', '-print_format', 'json', '-show_format', media_path],
+            stderr=subprocess.DEVNULL
+        )
+        return float(json.loads(output)['format']['duration'])
+    except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
+        return None
+
+
+# _probe_video_stream results keyed by (absolute path, mtime, size), so the same
+# unchanged file is probed once; oldest entries are dropped past the limit
+_PROBE_CACHE = {}
+_PROBE_CACHE_SIZE = 256
+_probe_cache_lock = threading.Lock()
+
+
+def _probe_video_stream(media_path):
+    """
+    Width and height of the first video stream, as the ffprobe stream dict
+    ({'width': ..., 'height': ...}), None if there is no video stream.
+    Raises subprocess.CalledProcessError if ffprobe fails.
+    """
+    stat = os.stat(media_path)
+    key = (os.path.abspath(media_path), stat.st_mtime_ns, stat.st_size)
+    with _probe_cache_lock:
+        if key in _PROBE_CACHE:
+            return _PROBE_CACHE[key]
+    # Only the stream header is needed, so demux at most 1MB / 0.5s of input
+    output = subprocess.run(
+        ['ffprobe', '-hide_banner', '-v', 'error', '-probesize', '1000000', '-analyzeduration', '500000',
+         '-select_streams', 'v:0', '-show_entries', 'stream=width,height', '-of', 'json', media_path],
+        stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=True
+    ).stdout
+    streams = json.loads(output).get('streams')
+    stream = streams[0] if streams else None
+    with _probe_cache_lock:
+        if len(_PROBE_CACHE) >= _PROBE_CACHE_SIZE:
+            del _PROBE_CACHE[next(iter(_PROBE_CACHE))]
+        _PROBE_CACHE[key] = stream
+    return stream
+
+
+class _FFmpegFrameWriter:
+    """
+    Drop-in replacement for cv2.VideoWriter that pipes raw BGR frames into FFmpeg,
+    so effect intermediates are H.264 (h264_nvenc when available) instead of mp4v
+    """
+
+    def __init__(self, output_path, fps, frame_size, use_nvenc=False):
+        w, h = frame_size
+        if use_nvenc:
+            encoder_args = ['-c:v', 'h264_nvenc', '-preset', 'p4', '-cq:v', '19']
+        else:
+            encoder_args = ['-c:v', 'libx264', '-preset', 'veryfast', '-crf', '18']
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-f', 'rawvideo', '-pix_fmt', 'bgr24',
+            '-s', f'{w}x{h}', '-r', str(fps),
+            '-i', '-',
+        ]
+        if w % 2 or h % 2:
+            # yuv420p needs even dimensions
+            cmd.extend(['-vf', 'crop=trunc(iw/2)*2:trunc(ih/2)*2'])
+        cmd.extend(encoder_args + ['-pix_fmt', 'yuv420p', output_path])
+        self._proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        # Contiguous frames (e.g. warpAffine output) are written without a copy
+        self._proc.stdin.write(memoryview(np.ascontiguousarray(frame)))
+
+    def release(self):
+        self._proc.stdin.close()
+        stderr = self._proc.stderr.read()
+        if self._proc.wait() != 0:
+            raise RuntimeError(f"FFmpeg frame encoding failed: {stderr.decode(errors='replace')[-200:]}")
+
+
+# Limits concurrent NVENC sessions across process_batch worker processes
+_nvenc_sessions = None
+
+
+def _init_batch_worker(nvenc_sessions):
+    global _nvenc_sessions
+    _nvenc_sessions = nvenc_sessions
+
+
+def _run_batch_job(processor, job):
+    """Run one process_batch job in a worker process, holding an NVENC session if it encodes on the GPU"""
+    if _nvenc_sessions is not None and processor._use_nvenc(job.get("use_gpu")):
+        with _nvenc_sessions:
+            return processor.process_file(**job)
+    return processor.process_file(**job)
+
 
 class AfterEffectsProcess:
-    def __init__(self, output_folder, logger=None):
+    # h264_nvenc and OpenCV CUDA availability, probed once per process
+    _nvenc_available = None
+    _nvenc_verified = False
+    _cuda_available = None
+
+    def __init__(self, output_folder, logger=None, verify_nvenc=False):
         self.output_folder = output_folder
         self.logger = logger
+        if verify_nvenc:
+            self._has_nvenc(verify_nvenc=True)
+
+    @classmethod
+    def _has_nvenc(cls, verify_nvenc=False):
+        """
+        Whether FFmpeg can encode with h264_nvenc on this host, cached on the class
+        The encoder list only shows the build supports NVENC, verify_nvenc=True also
+        runs a tiny test encode (once) to confirm a usable GPU is present
+        """
+        if cls._nvenc_available is None:
+            try:
+                cls._nvenc_available = 'h264_nvenc' in subprocess.check_output(
+                    ['ffmpeg', '-hide_banner', '-encoders'], text=True, stderr=subprocess.DEVNULL, timeout=10
+                )
+            except (OSError, subprocess.SubprocessError):
+                cls._nvenc_available = False
+        if verify_nvenc and cls._nvenc_available and not cls._nvenc_verified:
+            cls._nvenc_verified = True
+            test_cmd = ['ffmpeg', '-hide_banner', '-f', 'lavfi', '-i', 'nullsrc=s=256x256:d=0.1', '-c:v', 'h264_nvenc', '-f', 'null', '-']
+            try:
+                cls._nvenc_available = subprocess.run(test_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=10).returncode == 0
+            except (OSError, subprocess.SubprocessError):
+                cls._nvenc_available = False
+        return cls._nvenc_available
+
+    @classmethod
+    def _use_nvenc(cls, use_gpu=None):
+        """
+        Whether to encode with h264_nvenc for a use_gpu argument: never for False, and for
+        None (the default) only once the cached test encode passed, since stock FFmpeg
+        builds list h264_nvenc on hosts without an NVIDIA GPU
+        """
+        return use_gpu is not False and cls._has_nvenc(verify_nvenc=use_gpu is None)
+
+    @classmethod
+    def _has_cuda(cls):
+        """Whether this OpenCV build has cudacodec and sees a CUDA device, cached on the class"""
+        if cls._cuda_available is None:
+            try:
+                cls._cuda_available = hasattr(cv2, 'cudacodec') and cv2.cuda.getCudaEnabledDeviceCount() > 0
+            except (AttributeError, cv2.error):
+                cls._cuda_available = False
+        return cls._cuda_available
+
+    def process_batch(self, jobs, max_workers=None, nvenc_sessions=3):
+        """
+        Run process_file for many jobs in a pool of worker processes
+        Idle workers pick up the next pending job, so a slow job never holds back the rest
+        
+        Args:
+            jobs: List of process_file keyword argument dicts
+                  (a progress_callback, if given, must be picklable)
+            max_workers: Number of worker processes (default: half the CPU cores)
+            nvenc_sessions: Maximum concurrent NVENC jobs, consumer GPUs allow 3-5 sessions
+            
+        Yields:
+            tuple: (job, output_path or None) in completion order
+        """
+        if max_workers is None:
+            max_workers = max(1, (os.cpu_count() or 2) // 2)
+        sessions = multiprocessing.Semaphore(nvenc_sessions)
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_batch_worker, initargs=(sessions,)) as executor:
+            futures = {executor.submit(_run_batch_job, self, job): job for job in jobs}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
 
     def process_file(self, input_path=None, parameters=None, progress_callback=None, **kwargs):
         # Support both old and new calling methods
@@ -133,6 +471,7 @@ class AfterEffectsProcess:
             effect = parameters.get("effect", "random")
             effects = parameters.get("effects", None)
             watermark_path = parameters.get("watermark_path", None)
+            use_gpu = parameters.get("use_gpu", None)
             input_video = input_path
             input_image = None
             input_audio = None
@@ -142,6 +481,7 @@ class AfterEffectsProcess:
             effect = kwargs.get("effect", "random")
             effects = kwargs.get("effects", None)
             watermark_path = kwargs.get("watermark_path", None)
+            use_gpu = kwargs.get("use_gpu", None)
             input_video = kwargs.get("input_video", None)
             input_image = kwargs.get("input_image", None)
             input_audio = kwargs.get("input_audio", None)
@@ -158,7 +498,7 @@ class AfterEffectsProcess:
             # Priority 2: Create video from image + audio
             if progress_callback:
                 progress_callback(f"Creating video from image and audio")
-            source_path = self._create_video_from_image_audio(input_image, input_audio, progress_callback)
+            source_path = self._create_video_from_image_audio(input_image, input_audio, progress_callback, use_gpu=use_gpu)
             if not source_path:
                 return None
                 
@@ -193,34 +533,52 @@ class AfterEffectsProcess:
                 chosen_effect = effect
             else:
                 # Priority 3: Random from all available effects
-                chosen_effect = random.choice([e for e in EFFECTS if e != "random"])
+                chosen_effect = random.choice(_NON_RANDOM_EFFECTS)
             # Remove redundant effect application logging
             # if progress_callback:
             #     progress_callback(f"Applying effect '{chosen_effect}' to {os.path.basename(source_path)}")
+            
+            # Effect, aspect crop and watermark in a single FFmpeg encode; the
+            # OpenCV intermediate + MoviePy re-encode below remains the fallback
+            if self._ffmpeg_render_effect(
+                source_path,
+                output_path,
+                chosen_effect,
+                fps=int(getattr(clip, 'fps', 30) or 30),
+                w=clip.w,
+                h=clip.h,
+                watermark_path=watermark_path,
+                use_gpu=use_gpu,
+                progress_callback=progress_callback
+            ):
+                clip.close()
+                return output_path
+            
             temp_out_path = None
             original_audio = clip.audio  # Preserve original audio
+            # Pan output is already cropped to 16:9 / 9:16, zoom keeps the source size.
+            # With no crop or watermark left to apply, the effect output only needs the
+            # original audio muxed back in, not a MoviePy decode and re-encode
+            target_aspect = 16 / 9 if clip.w > clip.h else 9 / 16
+            needs_crop = chosen_effect in ("zoom_in", "zoom_out") and abs(clip.w / clip.h - target_aspect) > 0.01
+            has_watermark = bool(watermark_path and os.path.exists(watermark_path))
             
             if chosen_effect in ("zoom_in", "zoom_out"):
-                with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_out:
+                with tempfile.NamedTemporaryFile(suffix='.mp4', dir=_scratch_dir(), delete=False) as temp_out:
                     temp_out_path = temp_out.name
-                self._opencv_smooth_zoom(
+                self._smooth_zoom(
                     source_path,
                     temp_out_path,
                     chosen_effect,
                     fps=int(getattr(clip, 'fps', 30) or 30),
                     w=clip.w,
                     h=clip.h,
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    use_gpu=use_gpu
                 )
-                # Load the video-only clip and restore audio
-                clip = VideoFileClip(temp_out_path)
-                if original_audio:
-                    clip = clip.with_audio(original_audio)
-                    # if progress_callback:  # Clean up redundant logging
-                    #     progress_callback("Audio restored from original video")
                         
             elif chosen_effect in ("pan_left", "pan_right"):
-                with tempfile.NamedTemporaryFile(suffix='.mp4', delete=False) as temp_out:
+                with tempfile.NamedTemporaryFile(suffix='.mp4', dir=_scratch_dir(), delete=False) as temp_out:
                     temp_out_path = temp_out.name
                 self._opencv_smooth_pan(
                     source_path,
@@ -229,8 +587,15 @@ class AfterEffectsProcess:
                     fps=int(getattr(clip, 'fps', 30) or 30),
                     w=clip.w,
                     h=clip.h,
-                    progress_callback=progress_callback
+                    progress_callback=progress_callback,
+                    use_nvenc=self._use_nvenc(use_gpu)
                 )
+            
+            if temp_out_path:
+                if not needs_crop and not has_watermark and self._mux_original_audio(temp_out_path, source_path, output_path):
+                    clip.close()
+                    os.remove(temp_out_path)
+                    return output_path
                 # Load the video-only clip and restore audio
                 clip = VideoFileClip(temp_out_path)
                 if original_audio:
@@ -281,7 +646,7 @@ class AfterEffectsProcess:
                 clip = clip.with_effects(effects)
             
             # Add watermark if provided
-            if watermark_path and os.path.exists(watermark_path):
+            if has_watermark:
                 if progress_callback:
                     progress_callback(f"Adding watermark: {os.path.basename(watermark_path)}")
                 
@@ -290,8 +655,9 @@ class AfterEffectsProcess:
                 # Position watermark at top-left corner (10, 10) like in the original function
                 watermark_clip = watermark_clip.with_position((10, 10))
                 
-                # Composite video with watermark
-                clip = CompositeVideoClip([clip, watermark_clip])
+                # Composite video with watermark, the video itself is the background
+                # so MoviePy does not blend it onto a new empty frame every time
+                clip = CompositeVideoClip([clip, watermark_clip], use_bgclip=True)
                 
                 if progress_callback:
                     progress_callback("Watermark added successfully")
@@ -317,7 +683,7 @@ class AfterEffectsProcess:
                 progress_callback(f"Error processing {os.path.basename(source_path)}: {e}")
             return None
 
-    def _create_video_from_image_audio(self, input_image, input_audio, progress_callback=None):
+    def _create_video_from_image_audio(self, input_image, input_audio, progress_callback=None, use_gpu=None):
         """
         Create a video from image and audio files
         
@@ -325,129 +691,88 @@ class AfterEffectsProcess:
             input_image: Path to image file
             input_audio: Path to audio file
             progress_callback: Optional callback function
+            use_gpu: False to skip the NVENC probe and encode with libx264
             
         Returns:
             Path to created video file or None if failed
         """
         try:
-            # if progress_callback:  # Clean up redundant logging
-            #     progress_callback(f"Loading image: {os.path.basename(input_image)}")
-            
-            # Load audio to get duration
-            audio_clip = AudioFileClip(input_audio)
-            # Force resample to 48kHz for YouTube standard
-            if audio_clip.fps != 48000:
-                # if progress_callback:  # Clean up redundant logging
-                #     progress_callback(f"Resampling audio from {audio_clip.fps}Hz to 48000Hz...")
-                audio_clip = audio_clip.with_fps(48000)
-            audio_duration = audio_clip.duration
-            
-            # if progress_callback:  # Clean up redundant logging
-            #     progress_callback(f"Audio duration: {audio_duration:.2f} seconds")
-            
-            # Create video clip from image with audio duration
-            image_clip = ImageClip(input_image).with_duration(audio_duration)
-            image_clip = image_clip.with_fps(30)  # Set FPS for smooth playback
-            
-            # Apply smart cropping to maintain aspect ratio without distortion
-            image_clip = self._apply_smart_cropping(image_clip, progress_callback)
-            
-            # Add audio to video
-            video_clip = image_clip.with_audio(audio_clip)
+            # Crop the still image to 16:9 / 9:16 in the FFmpeg filter graph
+            # (same centered window as _apply_smart_cropping, even dimensions)
+            with Image.open(input_image) as image:
+                w, h = image.size
+            crop_w, crop_h = _aspect_crop_size(w, h)
+            if progress_callback:
+                progress_callback(f"Input: {w}x{h}, output: {crop_w}x{crop_h}")
             
             # Create temporary video file
-            temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', delete=False)
+            temp_video = tempfile.NamedTemporaryFile(suffix='.mp4', dir=_scratch_dir(), delete=False)
             temp_video_path = temp_video.name
             temp_video.close()
             
             if progress_callback:
                 progress_callback("Creating video from image and audio...")
             
-            # 🎯 GPU encoder detection and selection - Use direct FFmpeg instead of MoviePy
+            # 🎯 GPU encoder detection and selection - direct FFmpeg for both encoders
             if progress_callback:
                 progress_callback("Detecting optimal video encoder (GPU/CPU)...")
             
-            # Test if h264_nvenc encoder is available
-            encoder_test_cmd = ['ffmpeg', '-hide_banner', '-f', 'lavfi', '-i', 'nullsrc=s=256x256:d=0.1', '-c:v', 'h264_nvenc', '-f', 'null', '-']
-            use_gpu_encoding = False
-            try:
-                test_result = subprocess.run(encoder_test_cmd, capture_output=True, text=True, timeout=10)
-                if test_result.returncode == 0:
-                    use_gpu_encoding = True
-                    if progress_callback:
-                        progress_callback("✅ GPU encoder available - will use direct FFmpeg with h264_nvenc")
+            # h264_nvenc availability (and by default a test encode) is probed once per process
+            use_gpu_encoding = self._use_nvenc(use_gpu)
+            if progress_callback:
+                if use_gpu is False:
+                    progress_callback("🖥️  GPU encoding disabled - using FFmpeg with libx264")
+                elif use_gpu_encoding:
+                    progress_callback("✅ GPU encoder available - will use direct FFmpeg with h264_nvenc")
                 else:
-                    if progress_callback:
-                        progress_callback("🖥️  GPU encoder not available - using MoviePy with libx264")
-            except Exception as e:
-                if progress_callback:
-                    progress_callback(f"⚠️  GPU test failed - using MoviePy with libx264: {str(e)[:100]}")
+                    progress_callback("🖥️  GPU encoder not available - using FFmpeg with libx264")
+            
+            crop_filters = [f"crop={crop_w}:{crop_h}"] if (crop_w, crop_h) != (w, h) else []
+            # An explicit length ends the endless still-image stream exactly with the audio
+            audio_duration = _probe_duration(input_audio)
+            duration_args = ['-t', f"{audio_duration:.3f}"] if audio_duration else []
+            output_args = [
+                '-c:a', 'aac',                  # Audio encoder
+                '-af', 'aresample=48000',       # Audio resample filter
+                '-ar', '48000',                 # 48kHz sample rate
+                '-ac', '2',                     # Stereo
+                '-b:a', '128k',                 # Audio bitrate
+                '-r', '30',                     # Frame rate
+                '-shortest',                    # Use shortest stream
+                '-vsync', 'cfr',                # Constant frame rate
+            ] + duration_args
             
+            result = None
             if use_gpu_encoding:
-                # Use direct FFmpeg call for GPU encoding
-                if progress_callback:
-                    progress_callback("Creating video with direct FFmpeg GPU encoding...")
-                
+                # Decode, crop and upload the still once, then repeat the frame in
+                # GPU memory so NVENC reads it without a host copy per frame
+                gpu_cmd = [
+                    'ffmpeg', '-y', '-loglevel', 'quiet',
+                    '-framerate', '30', '-i', input_image,
+                    '-i', input_audio,
+                    '-vf', ','.join(crop_filters + ['format=nv12', 'hwupload_cuda', 'loop=loop=-1:size=1']),
+                ] + NVENC_ENCODE_ARGS + output_args + [temp_video_path]
+                result = subprocess.run(gpu_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                if result.returncode != 0 and progress_callback:
+                    progress_callback("⚠️  GPU encoding failed - retrying with libx264")
+            
+            if result is None or result.returncode != 0:
                 # Build FFmpeg command
                 ffmpeg_cmd = [
                     'ffmpeg', '-y', '-loglevel', 'quiet',
                     '-loop', '1', '-i', input_image,
                     '-i', input_audio,
-                    '-c:v', 'h264_nvenc',           # GPU encoder
-                    '-preset', 'p4',                # NVENC preset
-                    '-cq:v', '19',                  # Quality factor
-                    '-c:a', 'aac',                  # Audio encoder
-                    '-af', 'aresample=48000',       # Audio resample filter
-                    '-ar', '48000',                 # 48kHz sample rate
-                    '-ac', '2',                     # Stereo
-                    '-b:a', '128k',                 # Audio bitrate
+                ]
+                if crop_filters:
+                    ffmpeg_cmd.extend(['-vf', ','.join(crop_filters)])
+                # The CPU path always encodes with libx264, also as the fallback of a failed GPU run
+                ffmpeg_cmd.extend(X264_ENCODE_ARGS + output_args + [
                     '-pix_fmt', 'yuv420p',          # Pixel format
-                    '-r', '30',                     # Frame rate
-                    '-shortest',                    # Use shortest stream
-                    '-vsync', 'cfr',                # Constant frame rate
                     temp_video_path
-                ]
-                
+                ])
                 result = subprocess.run(ffmpeg_cmd, capture_output=True, text=True)
                 if result.returncode != 0:
-                    raise Exception(f"FFmpeg GPU encoding failed: {result.stderr}")
-                    
-                if progress_callback:
-                    progress_callback("✅ Direct FFmpeg GPU encoding completed")
-            else:
-                # Fallback to MoviePy CPU encoding
-                if progress_callback:
-                    progress_callback("Using MoviePy CPU encoding fallback...")
-                
-                # MoviePy write_videofile with compatible parameters
-                write_params = {
-                    'codec': 'libx264',
-                    'audio_codec': 'aac',
-                    'audio_bitrate': '128k',
-                    'audio_fps': 48000,  # 48kHz sample rate (YouTube standard)
-                    'preset': 'medium',
-                    'threads': 2,
-                    'logger': None
-                }
-                
-                # Try with crf parameter, fallback without it if not supported
-                try:
-                    video_clip.write_videofile(
-                        temp_video_path,
-                        crf=23,
-                        **write_params
-                    )
-                except TypeError:
-                    # Older MoviePy version without crf support
-                    video_clip.write_videofile(
-                        temp_video_path,
-                        **write_params
-                    )
-            
-            # Clean up clips
-            audio_clip.close()
-            image_clip.close()
-            video_clip.close()
+                    raise Exception(f"FFmpeg CPU encoding failed: {result.stderr}")
             
             if progress_callback:
                 progress_callback("Video created successfully from image and audio")
@@ -527,42 +852,235 @@ class AfterEffectsProcess:
                 progress_callback(f"Error in smart cropping: {e}")
             return clip  # Return original clip if cropping fails
 
+    def _ffmpeg_render_effect(self, source_path, output_path, effect, fps, w, h, watermark_path=None, use_gpu=None, progress_callback=None):
+        """
+        Render the zoom/pan effect, the 16:9 / 9:16 crop and the watermark with one
+        FFmpeg filter graph and a single encode (h264_nvenc when available)
+        
+        Returns:
+            bool: True if FFmpeg succeeded, False to fall back to the two-pass render
+        """
+        use_nvenc = self._use_nvenc(use_gpu)
+        cap = cv2.VideoCapture(source_path)
+        total_frames = max(2, int(cap.get(cv2.CAP_PROP_FRAME_COUNT)))
+        cap.release()
+        crop_w, crop_h = _aspect_crop_size(w, h)
+        
+        filters = []
+        if effect in ("zoom_in", "zoom_out"):
+            start_zoom, end_zoom = (1.0, 1.1) if effect == "zoom_in" else (1.1, 1.0)
+            # zoompan crops on an integer grid, upscaling first keeps the motion smooth
+            filters.append(f"scale={w * 2}:{h * 2}:flags=lanczos")
+            filters.append(
+                f"zoompan=z='{start_zoom}+({end_zoom}-{start_zoom})*on/{total_frames - 1}'"
+                f":d=1:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={w}x{h}:fps={fps}"
+            )
+            if (crop_w, crop_h) != (w, h):
+                filters.append(f"crop={crop_w}:{crop_h}")
+        elif effect in ("pan_left", "pan_right"):
+            # Slide the crop window from one edge to the center, as _opencv_smooth_pan does
+            center_x = (w - crop_w) // 2
+            start_x = w - crop_w if effect == "pan_left" else 0
+            filters.append(
+                f"crop={crop_w}:{crop_h}:x='{start_x}+({center_x}-{start_x})*n/{total_frames - 1}'"
+                f":y={(h - crop_h) // 2}"
+            )
+        elif (crop_w, crop_h) != (w, h):
+            filters.append(f"crop={crop_w}:{crop_h}")
+        
+        cmd = ['ffmpeg', '-y', '-loglevel', 'error']
+        if use_nvenc:
+            cmd.extend(['-hwaccel', 'cuda'])
+        cmd.extend(['-i', source_path])
+        filter_complex = f"[0:v]{','.join(filters) or 'null'}"
+        if watermark_path and os.path.exists(watermark_path):
+            if progress_callback:
+                progress_callback(f"Adding watermark: {os.path.basename(watermark_path)}")
+            cmd.extend(['-i', watermark_path])
+            # Watermark at its own size in the top-left corner (10, 10)
+            filter_complex += "[v];[v][1:v]overlay=10:10"
+        filter_complex += "[out]"
+        cmd.extend(['-filter_complex', filter_complex, '-map', '[out]', '-map', '0:a?'])
+        if use_nvenc:
+            cmd.extend(['-c:v', 'h264_nvenc', '-preset', 'p4', '-cq:v', '19'])
+        else:
+            cmd.extend(['-c:v', 'libx264', '-preset', 'medium', '-crf', '23'])
+        cmd.extend([
+            '-pix_fmt', 'yuv420p',
+            '-c:a', 'aac', '-b:a', '128k', '-ar', '48000',
+            '-movflags', '+faststart',
+            output_path
+        ])
+        
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            if progress_callback:
+                progress_callback(f"⚠️  Single-pass FFmpeg render failed, using two-pass render: {result.stderr[-200:]}")
+            return False
+        return True
+
     @staticmethod
-    def _opencv_smooth_zoom(input_path, output_path, effect, fps, w, h, progress_callback=None):
+    def _mux_original_audio(video_path, audio_source, output_path):
         """
-        Generate a smooth zoom in/out video using OpenCV per-frame affine transform.
-        The center remains fixed, and zoom is linearly interpolated from 1.0 to 1.1 (in) or 1.1 to 1.0 (out).
+        Copy the video stream of video_path and the audio of audio_source (if any)
+        into output_path, encoding only the audio (AAC 128k, 48kHz)
+        
+        Returns:
+            bool: True if FFmpeg succeeded, False to fall back to the MoviePy re-encode
+        """
+        cmd = [
+            'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+            '-i', video_path,
+            '-i', audio_source,
+            '-map', '0:v:0', '-map', '1:a:0?',
+            '-c:v', 'copy',
+            '-c:a', 'aac', '-ar', '48000', '-b:a', '128k',
+            '-shortest',
+            '-movflags', '+faststart',
+            output_path
+        ]
+        try:
+            return subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL).returncode == 0
+        except OSError:
+            return False
+
+    def _smooth_zoom(self, input_path, output_path, effect, fps, w, h, progress_callback=None, use_gpu=None):
+        """
+        Apply the zoom effect on the fastest available backend:
+        FFmpeg zoompan with NVENC, then OpenCV CUDA, then OpenCV on the CPU
+        """
+        args = (input_path, output_path, effect, fps, w, h, progress_callback)
+        if use_gpu is not False:
+            if self._use_nvenc(use_gpu) and self._ffmpeg_smooth_zoom(*args):
+                return
+            if self._has_cuda() and self._cuda_smooth_zoom(*args):
+                return
+        self._opencv_smooth_zoom(*args, use_nvenc=self._use_nvenc(use_gpu))
+
+    @staticmethod
+    def _ffmpeg_smooth_zoom(input_path, output_path, effect, fps, w, h, progress_callback=None):
+        """
+        Generate the same smooth zoom in/out as _opencv_smooth_zoom with a single FFmpeg
+        zoompan filter, decoded with NVDEC and encoded with h264_nvenc.
+        
+        Returns:
+            bool: True if FFmpeg succeeded, False to fall back to the OpenCV path
         """
         cap = cv2.VideoCapture(input_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        cap.release()
+        if total_frames <= 1:
+            total_frames = 2
+        if effect == "zoom_in":
+            start_zoom, end_zoom = 1.0, 1.1
+        else:
+            start_zoom, end_zoom = 1.1, 1.0
+        # zoompan crops on an integer grid, upscaling first keeps the motion smooth.
+        # The filters run on the CPU, so decoded frames are not kept in GPU memory.
+        zoom_filter = (
+            f"scale={w * 2}:{h * 2}:flags=lanczos,"
+            f"zoompan=z='{start_zoom}+({end_zoom}-{start_zoom})*on/{total_frames - 1}'"
+            f":d=1:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s={w}x{h}:fps={fps}"
+        )
+        cmd = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+            '-hwaccel', 'cuda',
+            '-i', input_path,
+            '-vf', zoom_filter,
+            '-an',
+            '-c:v', 'h264_nvenc',
+            '-preset', 'p4',
+            '-cq:v', '19',
+            '-pix_fmt', 'yuv420p',
+            output_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            if progress_callback:
+                progress_callback(f"⚠️  FFmpeg zoompan failed, using OpenCV: {result.stderr[-200:]}")
+            return False
+        return True
+
+    @staticmethod
+    def _cuda_smooth_zoom(input_path, output_path, effect, fps, w, h, progress_callback=None):
+        """
+        Same zoom as _opencv_smooth_zoom with frames kept in GPU memory:
+        cudacodec decode, cv2.cuda.warpAffine and cudacodec H.264 encode.
+        
+        Returns:
+            bool: True on success, False to fall back to the CPU path
+        """
+        try:
+            reader = cv2.cudacodec.createVideoReader(input_path)
+            reader.set(cv2.cudacodec.ColorFormat_BGR)
+            writer = cv2.cudacodec.createVideoWriter(output_path, (w, h), cv2.cudacodec.H264, fps)
+            cap = cv2.VideoCapture(input_path)
+            total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            cap.release()
+            if total_frames <= 1:
+                total_frames = 2
+            if effect == "zoom_in":
+                start_zoom, end_zoom = 1.0, 1.1
+            else:
+                start_zoom, end_zoom = 1.1, 1.0
+            # 2x3 affine of every frame, computed at once: only the scale and the
+            # center-keeping offset change between frames
+            zooms = np.linspace(start_zoom, end_zoom, total_frames, dtype=np.float32)
+            Ms = np.zeros((total_frames, 2, 3), dtype=np.float32)
+            Ms[:, 0, 0] = Ms[:, 1, 1] = zooms
+            Ms[:, 0, 2] = (1 - zooms) * (w / 2)
+            Ms[:, 1, 2] = (1 - zooms) * (h / 2)
+            for i in range(total_frames):
+                ret, gpu_frame = reader.nextFrame()
+                if not ret:
+                    break
+                # CUDA warpAffine has no Lanczos kernel, bicubic is the closest
+                writer.write(cv2.cuda.warpAffine(gpu_frame, Ms[i], (w, h), flags=cv2.INTER_CUBIC))
+            writer.release()
+            return True
+        except (AttributeError, cv2.error) as e:
+            if progress_callback:
+                progress_callback(f"⚠️  OpenCV CUDA zoom unavailable, using CPU: {str(e)[:100]}")
+            return False
+
+    @staticmethod
+    def _opencv_smooth_zoom(input_path, output_path, effect, fps, w, h, progress_callback=None, use_nvenc=False):
+        """
+        Generate a smooth zoom in/out video using an OpenCV per-frame resize and centered crop.
+        The center remains fixed, and zoom is linearly interpolated from 1.0 to 1.1 (in) or 1.1 to 1.0 (out).
+        """
+        cap = _open_capture(input_path)
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         in_fps = cap.get(cv2.CAP_PROP_FPS) or fps
         if total_frames <= 1:
             total_frames = 2
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        writer = cv2.VideoWriter(output_path, fourcc, fps, (w, h))
+        writer = _FFmpegFrameWriter(output_path, fps, (w, h), use_nvenc=use_nvenc)
         if effect == "zoom_in":
             start_zoom, end_zoom = 1.0, 1.1
         else:
             start_zoom, end_zoom = 1.1, 1.0
-        for i in range(total_frames):
-            ret, frame = cap.read()
-            if not ret:
-                break
-            alpha = i / (total_frames - 1)
-            zoom = start_zoom + alpha * (end_zoom - start_zoom)
-            # Build affine transform to keep center fixed
-            center = (w / 2, h / 2)
-            M = cv2.getRotationMatrix2D(center, 0, zoom)
-            frame_zoomed = cv2.warpAffine(frame, M, (w, h), flags=cv2.INTER_LANCZOS4)
-            writer.write(frame_zoomed)
+        # Centered source window for every frame, computed once. A centered scale with
+        # rotation 0 is the window resized to the output size, much cheaper than
+        # warpAffine, and it is written straight into a reused output buffer
+        zooms = np.linspace(start_zoom, end_zoom, total_frames)
+        crop_ws = np.minimum(np.rint(w / zooms).astype(int), w).tolist()
+        crop_hs = np.minimum(np.rint(h / zooms).astype(int), h).tolist()
+        windows = [((w - cw) // 2, (h - ch) // 2, cw, ch) for cw, ch in zip(crop_ws, crop_hs)]
+        ring = _frame_ring((h, w, 3))
+        def zoom_frame(i, frame):
+            x0, y0, cw, ch = windows[i]
             # Remove redundant zoom progress logging - already stable
             # if progress_callback and (i == 0 or i == total_frames // 2 or i == total_frames - 1):
             #     progress_callback(f"Zoom progress: {int((i+1) * 100 / total_frames)}%")
-        cap.release()
+            return cv2.resize(frame[y0:y0 + ch, x0:x0 + cw], (w, h), dst=ring[i % len(ring)], interpolation=cv2.INTER_LINEAR)
+        try:
+            _run_frame_pipeline(cap, writer, zoom_frame, total_frames)
+        finally:
+            cap.release()
         writer.release()
 
     @staticmethod
-    def _opencv_smooth_pan(input_path, output_path, effect, fps, w, h, progress_callback=None):
+    def _opencv_smooth_pan(input_path, output_path, effect, fps, w, h, progress_callback=None, use_nvenc=False):
         """
         Generate a smooth pan left/right video using OpenCV per-frame crop.
         For pan left: first frame's right edge aligns with output right, last frame is centered.
@@ -590,34 +1108,70 @@ class AfterEffectsProcess:
         else:  # pan_right
             start_x = 0          # left edge aligns
             end_x = center_x     # center
-        cap = cv2.VideoCapture(input_path)
+        # Both ends lie within the frame, so every interpolated crop window does too
+        start_x = max(0, min(start_x, w - crop_w))
+        end_x = max(0, min(end_x, w - crop_w))
+        cap = _open_capture(input_path)
         total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
         in_fps = cap.get(cv2.CAP_PROP_FPS) or fps
         if total_frames <= 1:
             total_frames = 2
-        fourcc = cv2.VideoWriter_fourcc(*"mp4v")
-        writer = cv2.VideoWriter(output_path, fourcc, fps, (crop_w, crop_h))
-        for i in range(total_frames):
-            ret, frame = cap.read()
-            if not ret:
-                break
-            alpha = i / (total_frames - 1)
-            x = int(round(start_x + (end_x - start_x) * alpha))
-            y = 0 if crop_h == h else (h - crop_h) // 2
+        writer = _FFmpegFrameWriter(output_path, fps, (crop_w, crop_h), use_nvenc=use_nvenc)
+        y = 0 if crop_h == h else (h - crop_h) // 2
+        # Crop windows are copied into reused contiguous buffers the writer pipes as-is
+        ring = _frame_ring((crop_h, crop_w, 3))
+        # Crop window x of every frame, computed at once
+        xs = np.rint(np.linspace(start_x, end_x, total_frames)).astype(int).tolist()
+        def pan_frame(i, frame):
+            x = xs[i]
             # Crop window
-            crop = frame[y:y+crop_h, x:x+crop_w]
-            # If needed, resize to output size (shouldn't be needed, but for safety)
-            if crop.shape[1] != crop_w or crop.shape[0] != crop_h:
-                crop = cv2.resize(crop, (crop_w, crop_h), interpolation=cv2.INTER_LANCZOS4)
-            writer.write(crop)
+            crop = ring[i % len(ring)]
+            np.copyto(crop, frame[y:y+crop_h, x:x+crop_w])
             # Only print progress at start, middle and end
             if progress_callback and (i == 0 or i == total_frames // 2 or i == total_frames - 1):
                 progress_callback(f"Pan progress: {int((i+1) * 100 / total_frames)}%")
-        cap.release()
+            return crop
+        try:
+            _run_frame_pipeline(cap, writer, pan_frame, total_frames)
+        finally:
+            cap.release()
         writer.release() 
 
 
-def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video=None, effects: list = ["zoom_in", "zoom_out"], watermark_path=None) -> tuple[bool, str]:
+# Encoder for create_video_with_subtitles_onestep, detected once per process
+_GPU_ENCODER: Optional[str] = None
+_gpu_encoder_lock = threading.Lock()
+
+
+def _detect_gpu_encoder() -> str:
+    """
+    'h264_nvenc' if a test encode on the GPU succeeds, 'libx264' otherwise
+    The test runs once per process (shared with AfterEffectsProcess._has_nvenc)
+    """
+    global _GPU_ENCODER
+    if _GPU_ENCODER is None:
+        with _gpu_encoder_lock:
+            if _GPU_ENCODER is None:
+                _GPU_ENCODER = 'h264_nvenc' if AfterEffectsProcess._has_nvenc(verify_nvenc=True) else 'libx264'
+    return _GPU_ENCODER
+
+
+def warm_up(use_gpu: bool = False):
+    """
+    Fill the per-process caches the first render would otherwise wait for: the
+    fc-list font lookup for each subtitle language and, with use_gpu, the NVENC test encode
+    """
+    for language in _SUBTITLE_LANGUAGE_CODES:
+        _resolve_font(language)
+    if use_gpu:
+        _detect_gpu_encoder()
+
+
+def _log_progress(msg):
+    logger.debug("Progress: %s", msg)
+
+
+def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video=None, effects: list = ["zoom_in", "zoom_out"], watermark_path=None, use_gpu: Optional[bool] = None) -> tuple[bool, str]:
     """
     Merges an audio file and a static image into a video file with effects and watermark.
     Uses the tested AfterEffectsProcess class for all processing.
@@ -628,6 +1182,7 @@ def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video
         output_video (str): Path for the output video file (e.g., MP4).
         effects (list, optional): List of effects to randomly choose from. Default: ["zoom_in", "zoom_out"]
         watermark_path (str, optional): Path to watermark image file.
+        use_gpu (bool, optional): False to force libx264, otherwise h264_nvenc is used when available.
 
     Returns:
         tuple[bool, str]: (success_status, output_path_or_error_message)
@@ -637,7 +1192,8 @@ def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video
         input_mp3 = os.path.abspath(input_mp3)
         input_image = os.path.abspath(input_image)
         
-        if not output_video: output_video = input_mp3.replace('.mp3', '.mp4')
+        # Next to the audio file, whatever its extension (WAV/M4A included)
+        if not output_video: output_video = os.path.splitext(input_mp3)[0] + '.mp4'
         output_video = os.path.abspath(output_video)
         
         # Ensure output directory exists
@@ -665,8 +1221,10 @@ def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video
             input_audio=input_mp3,
             effects=effects,
             watermark_path=watermark_path,
+            use_gpu=use_gpu,
             skip_existed=False,  # Always process for this function
-            progress_callback=print  # Use print function as progress_callback to show GPU/CPU info
+            # GPU/CPU and cropping diagnostics, the messages are only built when DEBUG is enabled
+            progress_callback=_log_progress if logger.isEnabledFor(logging.DEBUG) else None
         )
         
         if result: # Move result to expected output path if different
@@ -677,35 +1235,196 @@ def merge_audio_image_to_video_with_effects(input_mp3, input_image, output_video
     except Exception as e: return False, f"Error creating video: {str(e)}"
 
 
+# One pool shared by every async wrapper, so concurrent callers together run at most
+# one render per core instead of one FFmpeg process per pending coroutine
+_ASYNC_RENDER_EXECUTOR = ThreadPoolExecutor(max_workers=os.cpu_count() or 4, thread_name_prefix='async-render')
+
+
+async def _run_render(func, *args, **kwargs):
+    """Run a blocking render on the shared async render pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_ASYNC_RENDER_EXECUTOR, partial(func, *args, **kwargs))
+
+
+async def merge_audio_image_to_video_with_effects_async(*args, **kwargs) -> tuple[bool, str]:
+    """
+    merge_audio_image_to_video_with_effects without blocking the event loop, so one
+    process can keep several effect renders in flight while FFmpeg and OpenCV work
+    """
+    return await _run_render(merge_audio_image_to_video_with_effects, *args, **kwargs)
+
+
+
+@lru_cache(maxsize=8)
+def _resolve_font(language):
+    """
+    get_local_font(language) split for the subtitle filters, cached per language
+    
+    Returns:
+        tuple: (font_info, font_dir, font_name, is_file), font_dir is "" unless
+               font_info is a .ttf file, font_name is then its file name without extension
+    """
+    font_info = get_local_font(language)
+    if isinstance(font_info, str) and font_info.endswith('.ttf') and os.path.exists(font_info):
+        return font_info, os.path.dirname(font_info), os.path.basename(font_info)[:-len('.ttf')], True
+    return font_info, "", font_info, False
+
+
+def _compute_style(background_box, background_opacity, is_portrait, outline_width=2):
+    """
+    ASS style colours and borders for the subtitle functions
+    
+    Returns:
+        tuple: (back_colour, border_style, outline_width, shadow_width), a semi-transparent
+               black box when background_box (0 = opaque, 1 = transparent), otherwise an
+               outline with a shadow on portrait videos
+    """
+    if background_box:
+        alpha_hex = format(int(background_opacity * 255), '02X')
+        return f"&H{alpha_hex}000000", 4, 0, 0
+    return "&H80000000", 1, outline_width, 1 if is_portrait else 0
+
+
+# SRT cue: timing line and its text up to the next blank line; and inline tags
+_SRT_CUE_RE = re.compile(
+    r'(\d+):(\d{2}):(\d{2})[,.](\d{1,3})[ \t]*-->[ \t]*(\d+):(\d{2}):(\d{2})[,.](\d{1,3})[^\n]*\n?(.*?)'
+    # A cue ends at a blank line, the end of the file, or the next cue's number and
+    # timing line when the blank line between two cues is missing
+    r'(?:\n[ \t]*\n|\Z|(?=^\d+[ \t]*\n\d+:\d{2}:\d{2}[,.]\d+[ \t]*-->))',
+    re.DOTALL | re.MULTILINE
+)
+_SRT_TAG_RE = re.compile(r'<(/?)([ibus])>|<[^>]*>', re.IGNORECASE)
+
+
+def _srt_tag_to_ass(match):
+    """<i>, <b>, <u>, <s> and their closing tags as ASS override tags, other tags dropped"""
+    if not match.group(2):
+        return ""
+    return "{\\%s%d}" % (match.group(2).lower(), 0 if match.group(1) else 1)
+
+
+def _srt_time_to_ass(hours, minutes, seconds, millis):
+    """HH:MM:SS,mmm as the H:MM:SS.cc ASS timestamp"""
+    return f"{int(hours)}:{minutes}:{seconds}.{int(millis.ljust(3, '0')) // 10:02d}"
+
+
+def srt_to_ass(srt_path: str, ass_path: str, style_line: str, play_res_x: int = 384, play_res_y: int = 288, wrap_style: int = 0):
+    """
+    Write an ASS file from an SRT file, with style_line as its Default style
+    Same result as an FFmpeg SRT to ASS conversion followed by a restyle, without the FFmpeg process
+    
+    Args:
+        srt_path: SRT subtitle file
+        ass_path: ASS file to write
+        style_line: Complete "Style: Default,..." line
+        play_res_x: PlayResX of the script, font sizes are relative to it (FFmpeg writes 384)
+        play_res_y: PlayResY of the script (FFmpeg writes 288)
+        wrap_style: ASS WrapStyle (0 = smart wrapping, 2 = no wrapping)
+        
+    Raises:
+        ValueError: If the file contains no SRT cues, ass_path is not written
+    """
+    with open(srt_path, 'rb') as f:
+        text = f.read().decode('utf-8-sig', errors='replace').replace('\r\n', '\n').replace('\r', '\n')
+    
+    # The regex engine scans for the timing lines, cue numbers between cues are skipped
+    events = []
+    for match in _SRT_CUE_RE.finditer(text):
+        start = _srt_time_to_ass(*match.group(1, 2, 3, 4))
+        end = _srt_time_to_ass(*match.group(5, 6, 7, 8))
+        body = _SRT_TAG_RE.sub(_srt_tag_to_ass, match.group(9).strip('\n')).replace('\n', '\\N')
+        events.append(f"Dialogue: 0,{start},{end},Default,,0,0,0,,{body}\n")
+    if not events:
+        raise ValueError(f"No SRT cues found in {srt_path}")
+    
+    header = (
+        f"[Script Info]\nScriptType: v4.00+\nWrapStyle: {wrap_style}\nPlayResX: {play_res_x}\nPlayResY: {play_res_y}\nScaledBorderAndShadow: yes\n\n"
+        "[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV\n"
+        f"{style_line}\n\n"
+        "[Events]\nFormat: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text\n"
+    )
+    with open(ass_path, 'wb') as f:
+        f.write((header + "".join(events)).encode('utf-8'))
+
+
+# Subtitle burn-in argv, the encoder arguments go between the two halves
+_ASS_CMD = ("ffmpeg", "-y", "-hide_banner", "-loglevel", "error", "-hwaccel", "auto", "-i", "{input}", "-vf", "{vf}")
+_ASS_CMD_OUTPUT = ("-c:a", "copy", "{output}")
+
+
+def _burn_subtitles(input_video_path: str, video_filter: str, encode_args: List[str], output_video_path: str):
+    """
+    Run the subtitle burn-in FFmpeg command; paths go to FFmpeg as separate arguments,
+    no shell quoting. Raises CalledProcessError with FFmpeg's stderr on failure
+    """
+    fields = {'input': input_video_path, 'vf': video_filter, 'output': output_video_path}
+    ffmpeg_cmd = [a.format_map(fields) for a in _ASS_CMD] + encode_args + [a.format_map(fields) for a in _ASS_CMD_OUTPUT]
+    subprocess.run(ffmpeg_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True, check=True)
 
-def add_subtitles_to_video(input_video_path: str, subtitle_path: str, output_video_path: str = None, font_size: int = None, outline_color: str = "&H00000000", background_box: bool = True, background_opacity: float = 0.5, language: str = 'english', force_redo = False) -> bool:
+
+# ISO 639-2 codes for the soft subtitle track language tag
+_SUBTITLE_LANGUAGE_CODES = {'chinese': 'chi', 'english': 'eng'}
+
+
+def _mux_soft_subtitles(input_video_path: str, subtitle_path: str, output_video_path: str, language: str) -> bool:
+    """
+    Add the subtitles as a text track (mov_text for MP4, SRT for MKV) with every
+    other stream copied, no video encode
+    """
+    subtitle_codec = 'srt' if output_video_path.lower().endswith('.mkv') else 'mov_text'
+    cmd = [
+        'ffmpeg', '-y', '-hide_banner', '-loglevel', 'error',
+        '-i', input_video_path,
+        '-i', subtitle_path,
+        '-map', '0:v', '-map', '0:a?', '-map', '1:0',
+        '-c', 'copy', '-c:s', subtitle_codec,
+        '-metadata:s:s:0', f"language={_SUBTITLE_LANGUAGE_CODES.get(language.lower(), 'und')}",
+        output_video_path
+    ]
+    result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    return result.returncode == 0 and os.path.exists(output_video_path) and os.path.getsize(output_video_path) > 0
+
+
+def _subtitled_output_path(input_video_path):
+    """Default output of the subtitle functions: <input name>_subtitled.mp4 next to the input"""
+    return os.path.splitext(input_video_path)[0] + '_subtitled.mp4'
+
+
+def _ass_path_for(subtitle_path):
+    """ASS file written for a subtitle file, never the subtitle file itself"""
+    ass_path = os.path.splitext(subtitle_path)[0] + '.ass'
+    # An .ass input keeps its original, the styled copy gets a second suffix
+    return ass_path + '.ass' if ass_path == subtitle_path else ass_path
+
+
+def add_subtitles_to_video(input_video_path: str, subtitle_path: str, output_video_path: str = None, font_size: int = None, outline_color: str = "&H00000000", background_box: bool = True, background_opacity: float = 0.5, language: str = 'english', force_redo = False, use_gpu: bool = False, threads: Optional[int] = None, softsub: bool = False) -> bool:
     try:
-        if not os.path.exists(input_video_path): return print(f"Input video does not exist at {input_video_path}")
-        if not os.path.exists(subtitle_path): return print(f"Subtitle file does not exist at {subtitle_path}")
+        if not output_video_path: output_video_path = _subtitled_output_path(input_video_path)
+        if not os.path.exists(input_video_path):
+            logger.error("Input video does not exist at %s", input_video_path)
+            return False
+        if not os.path.exists(subtitle_path):
+            logger.error("Subtitle file does not exist at %s", subtitle_path)
+            return False
         if os.path.isfile(output_video_path):
-            if not force_redo: return print(f"Output video already exists at {output_video_path}")
+            if not force_redo:
+                logger.info("Output video already exists at %s", output_video_path)
+                return False
             else: os.remove(output_video_path)
         
+        # Soft subtitles: a selectable text track, stream copied in seconds instead of a
+        # full re-encode, but the player renders it (no custom font, box or position)
+        if softsub: return _mux_soft_subtitles(input_video_path, subtitle_path, output_video_path, language)
+        
         # Get font information
-        font_info = get_local_font(language)
-        font_dir = ""
-        font_name = font_info
-        
-        # If returned value is file path, extract font directory and name
-        if isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf'):
-            font_dir = os.path.dirname(font_info)
-            font_name = os.path.basename(font_info).replace('.ttf', '')
-        elif isinstance(font_info, str) and '/' not in font_info:
-            # If it's a font name (like "Ubuntu"), use directly
-            font_name = font_info
+        font_info, font_dir, font_name, font_is_file = _resolve_font(language)
         
         # Get video information
         video_info = {}
         try:
-            cmd = f'ffprobe -v error -select_streams v:0 -show_entries stream=width,height -of csv=p=0:s=x "{input_video_path}"'
-            result = subprocess.check_output(cmd, shell=True).decode('utf-8').strip()
-            if result and 'x' in result:
-                video_width, video_height = map(int, result.split('x'))
+            stream = _probe_video_stream(input_video_path)
+            if stream:
+                video_width, video_height = stream['width'], stream['height']
                 video_info['width'] = video_width
                 video_info['height'] = video_height
                 
@@ -720,336 +1439,334 @@ def add_subtitles_to_video(input_video_path: str, subtitle_path: str, output_vid
             
             # Adjust subtitle position based on video height
             margin_v = 30  # Use fixed pixel value, 30 pixels from bottom
-        except Exception as e:
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError):
             # Default values
             font_size = font_size or 20
             margin_v = 60
         
+        # Set background box based on parameters
+        back_colour, border_style, outline_width, shadow_width = _compute_style(background_box, background_opacity, False)
+        
+        # Every style gets the same fields, keeping its name
+        # Alignment value 2 means bottom alignment (in ASS specification)
+        # If there's font file path, use complete path directly
+        font_for_ass = font_info if font_is_file else font_name
+        # Chinese fonts need to be bold
+        bold_value = 1 if language.lower() == 'chinese' else 0
+        style_fields = f",{font_for_ass},{font_size},&H00FFFFFF,&H00000000,{outline_color},{back_colour},{bold_value},0,0,0,100,100,0,0,{border_style},{outline_width},{shadow_width},2,10,10,{margin_v}"
+        
         # Use ass filter to add subtitles (ass format has better format control than srt)
-        # First convert SRT to ASS format
-        ass_path = subtitle_path.replace('.srt', '.ass')
-        convert_cmd = f'ffmpeg -y -loglevel quiet -i "{subtitle_path}" "{ass_path}"'
+        # SRT cues are written to a styled ASS file directly
+        ass_path = _ass_path_for(subtitle_path)
+        convert_cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', subtitle_path, ass_path]
         try:
-            # Execute SRT to ASS conversion
-            subprocess.run(convert_cmd, shell=True, check=True)
-            
-            # Modify ASS file with custom styles
-            if os.path.exists(ass_path):
-                try:
-                    # Read file content
-                    with open(ass_path, 'r', encoding='utf-8') as f:
-                        ass_content = f.read()
-                    
-                    # Use more precise way to modify styles
-                    # Find style section lines
-                    lines = ass_content.split('\n')
-                    new_lines = []
-                    
-                    # Add flag to track if we've modified the style section
-                    modified_style = False
-                    
-                    # Find [V4+ Styles] section and add our custom styles
-                    in_style_section = False
-                    
-                    for i, line in enumerate(lines):
-                        # Check if entering style section
-                        if '[V4+ Styles]' in line:
-                            in_style_section = True
-                            new_lines.append(line)
-                            continue
-                            
-                        # Check if leaving style section
-                        if in_style_section and line.strip().startswith('['):
-                            in_style_section = False
-                            
-                        # In style section, if encountered Format line (style definition line)
-                        if in_style_section and line.strip().startswith('Format:'):
-                            new_lines.append(line)
-                            continue
-                            
-                        # If encountered Style: line in style section, replace it
-                        if in_style_section and line.strip().startswith('Style:'):
-                            # Extract style name
-                            style_name = line.split(',')[0].strip().replace('Style:', '').strip()
-                            
-                            # Set background box based on parameters
-                            if background_box:
-                                # ASS color format test: use transparency value directly
-                                # 0x00 = completely opaque, 0xFF = completely transparent
-                                alpha_value = int(background_opacity * 255)  # Use transparency directly
-                                alpha_hex = format(alpha_value, '02X')
-                                back_colour = f"&H{alpha_hex}000000"  # Transparency + black background
-                                border_style = 4  # BorderStyle=4 (opaque box)
-                                outline_width = 0  # Remove outline, keep only background box
-                                shadow_width = 0   # Shadow width
-                            else:
-                                back_colour = f"&H000000FF"  # Opaque red background for testing
-                                border_style = 1  # Only outline, no background box
-                                outline_width = 2  # Normal outline width
-                                shadow_width = 0   # Shadow width
-                            
-                            # Create new style line, completely replace original style
-                            # Alignment value 2 means bottom alignment (in ASS specification)
-                            # If there's font file path, use complete path directly
-                            font_for_ass = font_info if (isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf')) else font_name
-                            # Chinese fonts need to be bold
-                            bold_value = 1 if language.lower() == 'chinese' else 0
-                            new_style = f"Style: {style_name},{font_for_ass},{font_size},&H00FFFFFF,&H00000000,{outline_color},{back_colour},{bold_value},0,0,0,100,100,0,0,{border_style},{outline_width},{shadow_width},2,10,10,{margin_v}"
-                            new_lines.append(new_style)
-                            modified_style = True
-                            continue
-                        
-                        # For other lines, keep unchanged
-                        new_lines.append(line)
-                    
-                    # If no style was modified (exceptional case)
-                    if not modified_style:
-                        # Try to add font definition info directly in header
-                        if '[Script Info]' in ass_content:
-                            # Set background box based on parameters
-                            if background_box:
-                                alpha_hex = format(int(background_opacity * 255), '02X')
-                                back_colour = f"&H{alpha_hex}000000"
-                                border_style = 4
-                                outline_width = 0  # Remove outline, keep only background box
-                                shadow_width = 0   # Shadow width
-                            else:
-                                back_colour = f"&H000000FF"  # Opaque red background for testing
-                                border_style = 1
-                                outline_width = 2  # Normal outline width
-                                shadow_width = 0   # Shadow width
-                            
-                            # Add font declaration after Script Info
-                            # If there's font file path, use complete path directly
-                            font_for_ass = font_info if (isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf')) else font_name
-                            # Chinese fonts need to be bold
-                            bold_value = 1 if language.lower() == 'chinese' else 0
-                            style_section = f"\n[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\nStyle: Default,{font_for_ass},{font_size},&H00FFFFFF,&H00000000,{outline_color},{back_colour},{bold_value},0,0,0,100,100,0,0,{border_style},{outline_width},{shadow_width},2,10,10,{margin_v}\n"
-                            ass_content = ass_content.replace('[Script Info]', f'[Script Info]{style_section}')
-                    
-                    # Recombine file content
-                    ass_content = '\n'.join(new_lines)
-                    
-                    # Write back to file
-                    with open(ass_path, 'w', encoding='utf-8') as f: f.write(ass_content)
-                except Exception as e: print(f"Failed to modify ASS file, will use original: {str(e)}")
-        except: ass_path = subtitle_path
+            try:
+                srt_to_ass(subtitle_path, ass_path, "Style: Default" + style_fields)
+            except ValueError:
+                # Not a parseable SRT: let FFmpeg convert it, then restyle the result
+                subprocess.run(convert_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+                
+                # Modify ASS file with custom styles
+                if os.path.exists(ass_path):
+                    try:
+                        # Scan the raw bytes with bytes.find (no decoding, no per-line strings) and
+                        # copy the unchanged ranges around each Style: line of [V4+ Styles] as they are
+                        style_fields_bytes = style_fields.encode('utf-8')
+                        out = bytearray()
+                        buf = Path(ass_path).read_bytes()
+                        section = buf.find(b'[V4+ Styles]')
+                        if section != -1:
+                            # The section ends where the next [Section] line starts
+                            section_end = buf.find(b'\n[', section)
+                            if section_end == -1:
+                                section_end = len(buf)
+                            prev = 0
+                            line = buf.find(b'\nStyle:', section, section_end)
+                            while line != -1:
+                                line_start = line + 1
+                                line_end = buf.find(b'\n', line_start, section_end)
+                                if line_end == -1:
+                                    line_end = section_end
+                                if buf[line_end - 1:line_end] == b'\r':
+                                    line_end -= 1
+                                name_end = buf.find(b',', line_start, line_end)
+                                style_name = buf[line_start + len(b'Style:'):name_end if name_end != -1 else line_end].strip()
+                                out += buf[prev:line_start]
+                                out += b'Style: ' + style_name + style_fields_bytes
+                                prev = line_end
+                                line = buf.find(b'\nStyle:', line_end, section_end)
+                            # Only rewrite the file if a style was replaced
+                            if prev:
+                                out += buf[prev:]
+
+                        if out:
+                            # Write back to file
+                            Path(ass_path).write_bytes(out)
+                    except (OSError, ValueError) as e: logger.warning("Failed to modify ASS file, will use original: %s", e)
+        except (OSError, subprocess.CalledProcessError): ass_path = subtitle_path
         
         # Build ffmpeg command with font and style settings for beautiful subtitles
-        # Use hwaccel to attempt GPU acceleration
+        # Use hwaccel to attempt GPU acceleration, and NVENC encoding when requested
+        # An explicit thread count keeps parallel batch jobs from oversubscribing the CPU
+        threads_args = ['-threads', str(threads)] if threads else []
         if os.path.exists(ass_path) and ass_path.endswith('.ass'):
             # Use ASS subtitles
-            if font_dir:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "ass=\"{ass_path}\":fontsdir={font_dir}" -c:a copy "{output_video_path}"'
-            else:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "ass=\"{ass_path}\"" -c:a copy "{output_video_path}"'
+            video_filter = f"ass='{ass_path}'"
+            encode_args = (NVENC_ENCODE_ARGS if use_gpu else []) + threads_args
         else:
             # Fallback to SRT subtitles, specify font size and position
             # Alignment=2 means bottom alignment (in ASS specification)
-            if font_dir:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "subtitles=\"{subtitle_path}\":force_style=\'FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10\':fontsdir={font_dir}" -c:v libx264 -preset medium -crf 23 -c:a copy "{output_video_path}"'
-            else:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "subtitles=\"{subtitle_path}\":force_style=\'FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10\'" -c:v libx264 -preset medium -crf 23 -c:a copy "{output_video_path}"'
+            video_filter = f"subtitles='{subtitle_path}':force_style='FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10'"
+            encode_args = (NVENC_ENCODE_ARGS if use_gpu else X264_ENCODE_ARGS) + threads_args
+        if font_dir:
+            video_filter += f":fontsdir='{font_dir}'"
         
-        # Execute command
-        subprocess.run(ffmpeg_cmd, shell=True, check=True)
+        # Execute command, FFmpeg errors are kept for the CalledProcessError
+        _burn_subtitles(input_video_path, video_filter, encode_args, output_video_path)
         
         # Verify output file
         if os.path.exists(output_video_path) and os.path.getsize(output_video_path) > 0: return True
         else: return False
             
-    except Exception as e: return False
+    except subprocess.CalledProcessError as e:
+        logger.error("FFmpeg failed to add subtitles: %s", (e.stderr or '').strip()[-500:])
+        return False
+    except OSError as e:
+        logger.error("Error adding subtitles to video: %s", e)
+        return False
 
 
 
 
-def add_subtitles_to_video_portrait(input_video_path: str, subtitle_path: str, output_video_path: str = None, font_size: int = None, outline_color: str = "&H00000000", background_box: bool = True, background_opacity: float = 0.5, language = 'english', force_redo = False) -> bool:
+def add_subtitles_to_video_portrait(input_video_path: str, subtitle_path: str, output_video_path: str = None, font_size: int = None, outline_color: str = "&H00000000", background_box: bool = True, background_opacity: float = 0.5, language = 'english', force_redo = False, use_gpu: bool = False, threads: Optional[int] = None, softsub: bool = False) -> bool:
     try:
+        if not output_video_path: output_video_path = _subtitled_output_path(input_video_path)
         if not os.path.exists(input_video_path): return False
         if not os.path.exists(subtitle_path): return False
         if os.path.isfile(output_video_path):
             if not force_redo: return False
             else: os.remove(output_video_path)
+        # Soft subtitles: a selectable text track, stream copied in seconds instead of a
+        # full re-encode, but the player renders it (no custom font, box or position)
+        if softsub: return _mux_soft_subtitles(input_video_path, subtitle_path, output_video_path, language)
         # Get font information
-        font_info = get_local_font(language)
-        font_dir = ""
-        font_name = font_info
-        
-        # If returned value is file path, extract font directory and name
-        if isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf'):
-            font_dir = os.path.dirname(font_info)
-            font_name = os.path.basename(font_info).replace('.ttf', '')
-        elif isinstance(font_info, str) and '/' not in font_info:
-            # If it's a font name (like "Ubuntu"), use directly
-            font_name = font_info
-        print(f"Testing with font: {font_name}, font_dir: {font_dir}")
+        font_info, font_dir, font_name, font_is_file = _resolve_font(language)
+        logger.debug("Using font: %s, font_dir: %s", font_name, font_dir)
         
         # Get video information
         video_info = {}
         try:
-            cmd = f'ffprobe -v error -select_streams v:0 -show_entries stream=width,height -of csv=p=0:s=x "{input_video_path}"'
-            result = subprocess.check_output(cmd, shell=True).decode('utf-8').strip()
-            if result and 'x' in result:
-                video_width, video_height = map(int, result.split('x'))
-                video_info['width'] = video_width
-                video_info['height'] = video_height
-                print(f"Video dimensions: {video_width}x{video_height}")
-                
-                # Detect if video is portrait (aspect ratio < 1 means portrait)
-                is_portrait = video_width / video_height < 1
-                print(f"Video orientation: {'Portrait (9:16)' if is_portrait else 'Landscape'} ({video_width}x{video_height})")
-                
-                # Calculate appropriate font size based on video resolution if not provided
-                # Font size calculation - scale based on video height
-                if not font_size:
-                    base_height = 1080
-                    # For portrait, adjust font size to appropriate value, restore original size
-                    if is_portrait:
-                        base_font_size = 33  # Restore original 33
-                        min_font = 22  # Adjusted from 27 to 22, adapted to landscape adjustment
-                        max_font = 39  # Restore original 39
-                    else:
-                        base_font_size = 30  # Restore original 30
-                        min_font = 24  # Restore original 24
-                        max_font = 48  # Restore original 48
-                    
-                    calculated_font_size = int(video_height / base_height * base_font_size)
-                    font_size = max(min_font, min(max_font, calculated_font_size))
-                    print(f"Calculated font size for subtitles: {font_size} (for {'portrait' if is_portrait else 'landscape'} video)")
-                else:
-                    print(f"Using provided font size for subtitles: {font_size}")
-                
-                # Adjust subtitle position based on video orientation - place at bottom 25% position
+            stream = _probe_video_stream(input_video_path)
+            # Fall back to the portrait defaults below when the video cannot be probed
+            if not stream:
+                raise ValueError("no video stream found")
+            video_width, video_height = stream['width'], stream['height']
+            video_info['width'] = video_width
+            video_info['height'] = video_height
+            logger.debug("Video dimensions: %dx%d", video_width, video_height)
+            
+            # Detect if video is portrait (aspect ratio < 1 means portrait)
+            is_portrait = video_width / video_height < 1
+            logger.debug("Video orientation: %s (%dx%d)", 'Portrait (9:16)' if is_portrait else 'Landscape', video_width, video_height)
+            
+            # Calculate appropriate font size based on video resolution if not provided
+            # Font size calculation - scale based on video height
+            if not font_size:
+                base_height = 1080
+                # For portrait, adjust font size to appropriate value, restore original size
                 if is_portrait:
-                    # Portrait videos use more appropriate bottom margin, corresponding to 25% of video height position
-                    margin_v = int(video_height * 0.25)  # 25% of video height
-                    margin_v = max(100, min(350, margin_v))  # Ensure margin is within reasonable range
+                    base_font_size = 33  # Restore original 33
+                    min_font = 22  # Adjusted from 27 to 22, adapted to landscape adjustment
+                    max_font = 39  # Restore original 39
                 else:
-                    margin_v = 60  # Landscape uses smaller fixed margin
-                print(f"Using margin_v: {margin_v} for {'portrait' if is_portrait else 'landscape'} video - positioned at bottom 25%")
+                    base_font_size = 30  # Restore original 30
+                    min_font = 24  # Restore original 24
+                    max_font = 48  # Restore original 48
+                
+                calculated_font_size = int(video_height / base_height * base_font_size)
+                font_size = max(min_font, min(max_font, calculated_font_size))
+                logger.debug("Calculated font size for subtitles: %d (for %s video)", font_size, 'portrait' if is_portrait else 'landscape')
+            else:
+                logger.debug("Using provided font size for subtitles: %s", font_size)
             
-                # Set outline width
-                outline_width = 3.0 if is_portrait else 2.0
-                print(f"Using outline width: {outline_width} for {'portrait' if is_portrait else 'landscape'} video")
+            # Adjust subtitle position based on video orientation - place at bottom 25% position
+            if is_portrait:
+                # Portrait videos use more appropriate bottom margin, corresponding to 25% of video height position
+                margin_v = int(video_height * 0.25)  # 25% of video height
+                margin_v = max(100, min(350, margin_v))  # Ensure margin is within reasonable range
+            else:
+                margin_v = 60  # Landscape uses smaller fixed margin
+            logger.debug("Using margin_v: %d for %s video - positioned at bottom 25%%", margin_v, 'portrait' if is_portrait else 'landscape')
+        
+            # Set outline width
+            outline_width = 3.0 if is_portrait else 2.0
+            logger.debug("Using outline width: %s for %s video", outline_width, 'portrait' if is_portrait else 'landscape')
             
-        except Exception as e:
-            print(f"Failed to get video info: {str(e)}")
+        except (OSError, subprocess.CalledProcessError, ValueError, KeyError) as e:
+            logger.warning("Failed to get video info, using portrait defaults: %s", e)
             # Default values, set smaller default values for portrait, also reduced by 20%
+            video_width, video_height = 1080, 1920
             font_size = font_size or 16  # Originally 20, reduced 20% to 16
             margin_v = 80
             outline_width = 2.5
         
         # Use ass filter to add subtitles (ass format has better format control than srt)
         # First convert SRT to ASS format
-        ass_path = subtitle_path.replace('.srt', '.ass')
-        if ass_path == subtitle_path:  # If file already has .ass suffix, avoid overwriting
-            ass_path = subtitle_path + '.ass'
+        ass_path = _ass_path_for(subtitle_path)
             
         # Delete existing ASS file first to ensure generating new one each time
         if os.path.exists(ass_path):
             os.remove(ass_path)
-            print(f"Removed existing ASS file: {ass_path}")
+            logger.debug("Removed existing ASS file: %s", ass_path)
             
-        # Convert SRT to ASS base file
-        convert_cmd = f'ffmpeg -y -loglevel quiet -i "{subtitle_path}" "{ass_path}"'
-        subprocess.run(convert_cmd, shell=True, check=True)
-        
-        # Read ASS content
-        with open(ass_path, 'r', encoding='utf-8') as f:
-            ass_content = f.read()
-        
         # Add automatic line wrapping settings to Script Info section
         play_res_x = int(video_width * 0.9)  # Set to 90% of video width, auto wrap when hitting edges
         
-        # Create new Script Info section with automatic line wrapping settings
-        new_script_info = """[Script Info]\nScriptType: v4.00+\nWrapStyle: 2\nPlayResX: {}\nPlayResY: {}\nScaledBorderAndShadow: yes\n\n""".format(play_res_x, video_height)
-        
-        # Find and replace [Script Info] section
-        if '[Script Info]' in ass_content:
-            import re
-            ass_content = re.sub(r'\[Script Info\][^\[]*', new_script_info, ass_content)
-        
         # Set background box based on parameters
-        if background_box:
-            # ASS color format: use transparency value directly
-            alpha_value = int(background_opacity * 255)  # Use transparency directly
-            alpha_hex = format(alpha_value, '02X')
-            back_colour = f"&H{alpha_hex}000000"  # Transparency + black background
-            border_style = 4  # BorderStyle=4 (opaque box)
-            outline_width_final = 0  # Remove outline, keep only background box
-            shadow_width = 0   # Shadow width
-            print(f"Portrait background opacity: {background_opacity}, alpha_value: {alpha_value}, alpha_hex: {alpha_hex}")
-        else:
-            back_colour = "&H80000000"  # Default background color
-            border_style = 1  # Only outline, no background box
-            outline_width_final = outline_width  # Use original outline width
-            shadow_width = 1   # Shadow width
+        back_colour, border_style, outline_width_final, shadow_width = _compute_style(background_box, background_opacity, True, outline_width)
+        if background_box: logger.debug("Portrait background opacity: %s, back_colour: %s", background_opacity, back_colour)
         
         # Create custom style
         # If there's font file path, use complete path directly
-        font_for_ass = font_info if (isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf')) else font_name
+        font_for_ass = font_info if font_is_file else font_name
         custom_style = f"Style: Default,{font_for_ass},{font_size},&H00FFFFFF,&H00000000,{outline_color},{back_colour},1,0,0,0,100,100,0,0,{border_style},{outline_width_final},{shadow_width},2,10,10,{margin_v}"
         
-        # Replace style section
-        if '[V4+ Styles]' in ass_content:
-            # If there's style section, find Style: line and replace
-            style_pattern = r'Style: [^\n]*'
-            if re.search(style_pattern, ass_content):
-                ass_content = re.sub(style_pattern, custom_style, ass_content)
-            else:
-                # If no Style line but has style section, add our style
-                format_line = ass_content.find('Format:', ass_content.find('[V4+ Styles]'))
-                if format_line > 0:
-                    insert_pos = ass_content.find('\n', format_line) + 1
-                    ass_content = ass_content[:insert_pos] + custom_style + '\n' + ass_content[insert_pos:]
-        else:
-            # If no style section, add complete style section
-            style_section = f"[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n{custom_style}\n\n"
-            events_pos = ass_content.find('[Events]')
-            if events_pos > 0:
-                ass_content = ass_content[:events_pos] + style_section + ass_content[events_pos:]
-            else:
-                ass_content += '\n' + style_section
+        try:
+            # Write the ASS file straight from the SRT cues with the custom style and wrapping
+            srt_to_ass(subtitle_path, ass_path, custom_style, play_res_x=play_res_x, play_res_y=video_height, wrap_style=2)
+        except ValueError:
+            # Not a parseable SRT: let FFmpeg convert it, then restyle the result
+            # Convert SRT to ASS base file
+            convert_cmd = ['ffmpeg', '-y', '-hide_banner', '-loglevel', 'error', '-i', subtitle_path, ass_path]
+            subprocess.run(convert_cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        
+            # Read ASS content as raw bytes, the markers edited below are all ASCII
+            ass_content = Path(ass_path).read_bytes()
+            custom_style_bytes = custom_style.encode('utf-8')
         
-        # Write back updated ASS file
-        with open(ass_path, 'w', encoding='utf-8') as f:
-            f.write(ass_content)
-        print(f"Created custom ASS file with auto line-wrap (PlayResX: {play_res_x}) and positioned at bottom 25% (margin_v={margin_v})")
+            # Create new Script Info section with automatic line wrapping settings
+            new_script_info = f"[Script Info]\nScriptType: v4.00+\nWrapStyle: 2\nPlayResX: {play_res_x}\nPlayResY: {video_height}\nScaledBorderAndShadow: yes\n\n".encode('ascii')
+        
+            # Find and replace [Script Info] section
+            if b'[Script Info]' in ass_content:
+                ass_content = _SCRIPT_INFO_RE.sub(new_script_info, ass_content)
+        
+            # Replace the style lines (or add ours) right after the style section Format line, in one scan
+            ass_content, replaced = _ASS_STYLES_RE.subn(lambda m: m.group(1) + custom_style_bytes + b'\n', ass_content, count=1)
+            if not replaced:
+                # If no style section, add complete style section
+                style_section = b"[V4+ Styles]\nFormat: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, Alignment, MarginL, MarginR, MarginV, Encoding\n" + custom_style_bytes + b"\n\n"
+                events_pos = ass_content.find(b'[Events]')
+                if events_pos > 0:
+                    ass_content = ass_content[:events_pos] + style_section + ass_content[events_pos:]
+                else:
+                    ass_content += b'\n' + style_section
+        
+            # Write back updated ASS file
+            Path(ass_path).write_bytes(ass_content)
+        logger.debug("Created custom ASS file with auto line-wrap (PlayResX: %d) and positioned at bottom 25%% (margin_v=%d)", play_res_x, margin_v)
         
         
         # Build ffmpeg command with font and style settings for beautiful subtitles
-        # Use hwaccel to attempt GPU acceleration
+        # Use hwaccel to attempt GPU acceleration, and NVENC encoding when requested
+        # An explicit thread count keeps parallel batch jobs from oversubscribing the CPU
+        threads_args = ['-threads', str(threads)] if threads else []
         if os.path.exists(ass_path) and ass_path.endswith('.ass'):
             # Use ASS subtitles
-            if font_dir:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "ass=\"{ass_path}\":fontsdir={font_dir}" -c:a copy "{output_video_path}"'
-            else:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "ass=\"{ass_path}\"" -c:a copy "{output_video_path}"'
+            video_filter = f"ass='{ass_path}'"
+            encode_args = (NVENC_ENCODE_ARGS if use_gpu else []) + threads_args
         else:
             # Fallback to SRT subtitles, specify font size and position, enhance outline for better readability
-            if font_dir:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "subtitles=\"{subtitle_path}\":force_style=\'FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10,Outline=3\':fontsdir={font_dir}" -c:v libx264 -preset medium -crf 23 -c:a copy "{output_video_path}"'
-            else:
-                ffmpeg_cmd = f'ffmpeg -y -loglevel quiet -hwaccel auto -i "{input_video_path}" -vf "subtitles=\"{subtitle_path}\":force_style=\'FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10,Outline=3\'" -c:v libx264 -preset medium -crf 23 -c:a copy "{output_video_path}"'
+            video_filter = f"subtitles='{subtitle_path}':force_style='FontSize={font_size},FontName={font_name},MarginV={margin_v},PrimaryColour=&H00FFFFFF,OutlineColour={outline_color},BackColour=&H80000000,Bold=1,Italic=0,Alignment=2,MarginL=10,MarginR=10,Outline=3'"
+            encode_args = (NVENC_ENCODE_ARGS if use_gpu else X264_ENCODE_ARGS) + threads_args
+        if font_dir:
+            video_filter += f":fontsdir='{font_dir}'"
         
-        # Execute command
-        subprocess.run(ffmpeg_cmd, shell=True, check=True)
+        # Execute command, FFmpeg errors are kept for the CalledProcessError
+        _burn_subtitles(input_video_path, video_filter, encode_args, output_video_path)
         
         # Verify output file
         if os.path.exists(output_video_path) and os.path.getsize(output_video_path) > 0:
-            print(f"Successfully added subtitles to video: {output_video_path}")
+            logger.debug("Successfully added subtitles to video: %s", output_video_path)
             return True
         else:
-            print(f"Failed to add subtitles: output file does not exist or is empty")
+            logger.error("Failed to add subtitles: output file does not exist or is empty")
             return False
             
-    except Exception as e:
-        print(f"Error adding subtitles to video: {str(e)}")
+    except subprocess.CalledProcessError as e:
+        logger.error("FFmpeg failed to add subtitles: %s", (e.stderr or '').strip()[-500:])
+        return False
+    except OSError as e:
+        logger.error("Error adding subtitles to video: %s", e)
         return False
 
 
 
 
+def _run_subtitle_job(job):
+    """Run one add_subtitles_to_videos_batch job in a worker process"""
+    job = dict(job)
+    if job.pop('is_portrait', False):
+        return add_subtitles_to_video_portrait(**job)
+    return add_subtitles_to_video(**job)
+
+
+def add_subtitles_to_videos_batch(jobs: List[dict], max_workers: Optional[int] = None, threads_per_job: int = 4) -> List[bool]:
+    """
+    Burn subtitles into many videos with parallel FFmpeg processes
+    
+    Args:
+        jobs: List of add_subtitles_to_video keyword argument dicts, a job with
+              is_portrait=True runs add_subtitles_to_video_portrait instead
+        max_workers: Number of worker processes (default: CPU cores / threads_per_job)
+        threads_per_job: FFmpeg -threads per job, so all workers together use about every core
+        
+    Returns:
+        List[bool]: Result of every job, in the order of jobs
+    """
+    if max_workers is None:
+        max_workers = max(1, (os.cpu_count() or threads_per_job) // threads_per_job)
+    jobs = [dict(job, threads=job.get('threads', threads_per_job)) for job in jobs]
+    # Fonts are resolved once per worker process (get_local_font is cached)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_subtitle_job, jobs))
+
+
+async def add_subtitles_to_video_async(*args, is_portrait: bool = False, **kwargs) -> bool:
+    """
+    add_subtitles_to_video (or add_subtitles_to_video_portrait with is_portrait=True)
+    without blocking the event loop. FFmpeg does the work in its own process, so callers
+    wanting parallelism can run several jobs at once with asyncio.gather.
+    """
+    func = add_subtitles_to_video_portrait if is_portrait else add_subtitles_to_video
+    return await _run_render(func, *args, **kwargs)
+
+
+async def add_subtitles_to_videos_batch_async(jobs: List[dict], max_concurrent: Optional[int] = None, threads_per_job: int = 4) -> List[bool]:
+    """
+    add_subtitles_to_videos_batch for callers on an event loop: the jobs are independent,
+    so their FFmpeg processes run side by side through asyncio.gather
+    
+    Args:
+        jobs: List of add_subtitles_to_video keyword argument dicts, a job with
+              is_portrait=True runs add_subtitles_to_video_portrait instead
+        max_concurrent: Jobs running at once (default: CPU cores / threads_per_job)
+        threads_per_job: FFmpeg -threads per job, so all jobs together use about every core
+        
+    Returns:
+        List[bool]: Result of every job, in the order of jobs
+    """
+    if max_concurrent is None:
+        max_concurrent = max(1, (os.cpu_count() or threads_per_job) // threads_per_job)
+    semaphore = asyncio.Semaphore(max_concurrent)
+    
+    async def run(job):
+        async with semaphore:
+            return await _run_render(_run_subtitle_job, dict(job, threads=job.get('threads', threads_per_job)))
+    
+    return list(await asyncio.gather(*(run(job) for job in jobs)))
+
+
 def create_video_with_subtitles_onestep(
     input_image: str,
     input_audio: str,
@@ -1063,7 +1780,8 @@ def create_video_with_subtitles_onestep(
     is_portrait: bool = False,
     effects: Optional[List[str]] = None,
     watermark_path: Optional[str] = None,
-    progress_callback=None
+    progress_callback=None,
+    use_gpu: Optional[bool] = None
 ) -> bool:
     """
     One-step completion of image + audio + subtitles video generation
@@ -1082,6 +1800,8 @@ def create_video_with_subtitles_onestep(
         effects: Effects list (reserved parameter, not implemented yet)
         watermark_path: Watermark image path
         progress_callback: Progress callback function
+        use_gpu: True to use h264_nvenc when available, False to force libx264,
+                 None to detect the GPU only on RunPod
     
     Returns:
         bool: True if successful, False if failed
@@ -1110,22 +1830,13 @@ def create_video_with_subtitles_onestep(
             return False
         
         # Get font information
-        font_info = get_local_font(language)
-        font_dir = ""
-        font_name = font_info
-        
-        if isinstance(font_info, str) and os.path.exists(font_info) and font_info.endswith('.ttf'):
-            font_dir = os.path.dirname(font_info)
-            font_name = os.path.basename(font_info).replace('.ttf', '')
-        elif isinstance(font_info, str) and '/' not in font_info:
-            font_name = font_info
+        font_info, font_dir, font_name, font_is_file = _resolve_font(language)
         
         # Get video resolution (from image)
-        probe_cmd = f'ffprobe -v error -select_streams v:0 -show_entries stream=width,height -of csv=p=0:s=x "{input_image}"'
-        result = subprocess.check_output(probe_cmd, shell=True).decode('utf-8').strip()
+        stream = _probe_video_stream(input_image)
         
-        if result and 'x' in result:
-            video_width, video_height = map(int, result.split('x'))
+        if stream:
+            video_width, video_height = stream['width'], stream['height']
         else:
             # Default resolution
             video_width = 1920 if not is_portrait else 1080
@@ -1170,26 +1881,12 @@ def create_video_with_subtitles_onestep(
         use_gpu_encoding = False
         gpu_encoder = 'libx264'
         
-        # Detect GPU in RunPod environment
-        if os.environ.get('RUNPOD_POD_ID') or which_ubuntu == 'RunPod':
-            test_cmd = ['ffmpeg', '-hide_banner', '-f', 'lavfi', '-i', 'nullsrc=s=256x256:d=0.1', 
-                       '-c:v', 'h264_nvenc', '-f', 'null', '-']
-            try:
-                test_result = subprocess.run(test_cmd, capture_output=True, text=True)
-                if test_result.returncode == 0:
-                    use_gpu_encoding = True
-                    gpu_encoder = 'h264_nvenc'
-                    if progress_callback:
-                        progress_callback("✅ GPU encoder available - will use h264_nvenc")
-            except:
-                pass
-        
-        # Build FFmpeg command
-        cmd = [
-            'ffmpeg', '-y', '-loglevel', 'error',
-            '-loop', '1', '-i', input_image,  # Image input
-            '-i', input_audio,                # Audio input
-        ]
+        # Detect GPU when requested, or by default in RunPod environment
+        if use_gpu or (use_gpu is None and RUNPOD_ENV):
+            gpu_encoder = _detect_gpu_encoder()
+            use_gpu_encoding = gpu_encoder == 'h264_nvenc'
+            if use_gpu_encoding and progress_callback:
+                progress_callback("✅ GPU encoder available - will use h264_nvenc")
         
         # Add video filters
         video_filters = []
@@ -1198,6 +1895,9 @@ def create_video_with_subtitles_onestep(
         video_filters.append(f"scale={video_width}:{video_height}:force_original_aspect_ratio=decrease")
         video_filters.append(f"pad={video_width}:{video_height}:(ow-iw)/2:(oh-ih)/2")
         video_filters.append("setsar=1")
+        # The still image is read at 1 fps, so it is scaled and padded once per second;
+        # frames are duplicated to 30 fps only after that (and before subtitle timing)
+        video_filters.append("fps=30")
         
         # Only add subtitle filter when subtitle file exists
         if has_subtitles:
@@ -1239,72 +1939,79 @@ def create_video_with_subtitles_onestep(
             video_filters.append(subtitle_filter)
         
         # Handle filter combination
-        if watermark_path and os.path.exists(watermark_path):
+        has_watermark = bool(watermark_path and os.path.exists(watermark_path))
+        video_filters_str = ",".join(video_filters)
+        if has_watermark:
             # Case with watermark, use -filter_complex
             watermark_width = int(video_width / 8)  # Watermark width is 1/8 of video width
-            
-            if video_filters:
-                # With both subtitles and watermark
-                video_filters_str = ",".join(video_filters)
-                # Use filter_complex to combine subtitles and watermark
-                filter_complex = f"[0:v]{video_filters_str}[v];movie={watermark_path},scale={watermark_width}:-1[watermark];[v][watermark]overlay=10:10"
-                cmd.extend([
-                    '-filter_complex', filter_complex,
-                ])
-            else:
-                # Only watermark, no subtitles
-                filter_complex = f"movie={watermark_path},scale={watermark_width}:-1[watermark];[0:v][watermark]overlay=10:10"
-                cmd.extend([
-                    '-filter_complex', filter_complex,
-                ])
+            # Use filter_complex to combine subtitles and watermark
+            filter_args = ['-filter_complex', f"[0:v]{video_filters_str}[v];movie={watermark_path},scale={watermark_width}:-1[watermark];[v][watermark]overlay=10:10"]
+            # Same graph with the overlay done by overlay_cuda on uploaded frames,
+            # so NVENC reads the result from GPU memory without another host copy
+            gpu_filter_args = ['-filter_complex', f"[0:v]{video_filters_str},format=nv12,hwupload_cuda[v];movie={watermark_path},scale={watermark_width}:-1,format=yuva420p,hwupload_cuda[watermark];[v][watermark]overlay_cuda=10:10"]
             
             if progress_callback:
                 progress_callback(f"Adding watermark from: {watermark_path}")
         else:
             # Case without watermark
-            if video_filters:
-                # Only subtitles, use -vf
-                video_filters_str = ",".join(video_filters)
-                cmd.extend([
-                    '-vf', video_filters_str,
-                ])
-        
-        cmd.extend([
-            '-c:v', gpu_encoder,              # Video encoder
-        ])
+            filter_args = ['-vf', video_filters_str]
+            gpu_filter_args = ['-vf', f"{video_filters_str},format=nv12,hwupload_cuda"]
         
-        # GPU encoding parameters
+        # Video encoder and GPU encoding parameters
         if use_gpu_encoding:
-            cmd.extend([
-                '-preset', 'p4',              # NVENC preset
-                '-cq:v', '19',                # Quality factor
-            ])
+            # The input is always a still image
+            encoder_args = ['-c:v', gpu_encoder] + NVENC_STILL_IMAGE_ARGS
         else:
-            cmd.extend([
+            encoder_args = [
+                '-c:v', gpu_encoder,
                 '-preset', 'medium',
                 '-crf', '23',
-            ])
+                '-tune', 'stillimage',        # Static picture, only subtitles change
+            ]
+        # Frames leave the CPU filter chain in yuv420p (the CUDA chain uploads nv12)
+        filter_args += ['-pix_fmt', 'yuv420p']
         
         # Audio parameters - ensure 48kHz output
-        cmd.extend([
+        output_args = encoder_args + [
             '-c:a', 'aac',                    # Audio encoder
             '-af', 'aresample=48000',         # Audio resample filter
             '-ar', '48000',                   # 48kHz sample rate
             '-ac', '2',                       # Stereo
             '-b:a', '128k',                   # Audio bitrate
-            '-pix_fmt', 'yuv420p',            # Pixel format
             '-r', '30',                       # Frame rate
-            '-shortest',                      # Use shortest stream
             '-vsync', 'cfr',                  # Constant frame rate
             '-movflags', '+faststart',        # Optimize streaming playback
-            output_video
-        ])
+        ]
+        
+        # The looped image is cut to the audio length, -shortest only when it is unknown
+        audio_duration = _probe_duration(input_audio)
+        if audio_duration:
+            image_args = ['-loop', '1', '-framerate', '1', '-t', f"{audio_duration:.3f}", '-i', input_image]
+        else:
+            image_args = ['-loop', '1', '-framerate', '1', '-i', input_image]
+            output_args.append('-shortest')
+        output_args.append(output_video)
+        
+        # Build FFmpeg command
+        input_args = [
+            'ffmpeg', '-y', '-loglevel', 'error',
+        ] + image_args + [                    # Image input
+            '-i', input_audio,                # Audio input
+        ]
         
         if progress_callback:
             progress_callback(f"Executing FFmpeg command with {gpu_encoder} encoder...")
         
-        # Execute command
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        result = None
+        if use_gpu_encoding:
+            # Execute command with the CUDA upload filters
+            result = subprocess.run(input_args + gpu_filter_args + output_args, capture_output=True, text=True)
+            if result.returncode != 0 and progress_callback:
+                progress_callback("⚠️  CUDA filters failed - retrying with CPU filters")
+        
+        if result is None or result.returncode != 0:
+            # Execute command
+            result = subprocess.run(input_args + filter_args + output_args, capture_output=True, text=True)
         
         if result.returncode != 0:
             if progress_callback:
@@ -1325,3 +2032,11 @@ def create_video_with_subtitles_onestep(
         if progress_callback:
             progress_callback(f"Exception: {str(e)}")
         return False
+
+
+async def create_video_with_subtitles_onestep_async(*args, **kwargs) -> bool:
+    """
+    create_video_with_subtitles_onestep without blocking the event loop, so one
+    process can keep several encodes in flight while FFmpeg runs
+    """
+    return await _run_render(create_video_with_subtitles_onestep, *args, **kwargs)
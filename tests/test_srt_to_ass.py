@@ -0,0 +1,53 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+core_functions = pytest.importorskip("core_functions")
+
+
+def _dialogue_lines(tmp_path, srt_text):
+    srt_path = tmp_path / "input.srt"
+    ass_path = tmp_path / "output.ass"
+    srt_path.write_text(srt_text, encoding="utf-8")
+    core_functions.srt_to_ass(str(srt_path), str(ass_path), "Style: Default,Arial,20")
+    return [line for line in ass_path.read_text(encoding="utf-8").splitlines() if line.startswith("Dialogue:")]
+
+
+def test_cues_separated_by_blank_lines(tmp_path):
+    dialogues = _dialogue_lines(tmp_path, (
+        "1\n00:00:01,000 --> 00:00:02,500\nHello\n\n"
+        "2\n00:00:03,000 --> 00:00:04,000\nTwo\nlines\n"
+    ))
+    assert dialogues == [
+        "Dialogue: 0,0:00:01.00,0:00:02.50,Default,,0,0,0,,Hello",
+        "Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,Two\\Nlines",
+    ]
+
+
+def test_cues_without_blank_line_between_them(tmp_path):
+    dialogues = _dialogue_lines(tmp_path, (
+        "1\n00:00:01,000 --> 00:00:02,000\nFirst\n"
+        "2\n00:00:02,000 --> 00:00:03,000\nSecond\n"
+        "3\n00:00:03,000 --> 00:00:04,000\nThird\n"
+    ))
+    assert dialogues == [
+        "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,First",
+        "Dialogue: 0,0:00:02.00,0:00:03.00,Default,,0,0,0,,Second",
+        "Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,Third",
+    ]
+
+
+def test_numeric_and_empty_cues_without_blank_line_between_them(tmp_path):
+    dialogues = _dialogue_lines(tmp_path, (
+        "1\n00:00:01,000 --> 00:00:02,000\n1\n"
+        "2\n00:00:03,000 --> 00:00:04,000\n"
+        "3\n00:00:05,000 --> 00:00:06,000\nb\n"
+    ))
+    assert dialogues == [
+        "Dialogue: 0,0:00:01.00,0:00:02.00,Default,,0,0,0,,1",
+        "Dialogue: 0,0:00:03.00,0:00:04.00,Default,,0,0,0,,",
+        "Dialogue: 0,0:00:05.00,0:00:06.00,Default,,0,0,0,,b",
+    ]
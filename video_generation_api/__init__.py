@@ -7,19 +7,28 @@ __version__ = "1.0.1"
 __author__ = "Leo Wang"
 __email__ = "preangelleo@gmail.com"
 
-from .core_functions import (
-    create_video_with_subtitles_onestep,
-    merge_audio_image_to_video_with_effects,
-    add_subtitles_to_video,
-    add_subtitles_to_video_portrait,
-    AfterEffectsProcess,
-    get_local_font,
-    get_output_filename,
-    EFFECTS
-)
-
 from .api_client import VideoGenerationClient
 
+# core_functions pulls in OpenCV, MoviePy and NumPy, so it is imported on first
+# access; API client and CLI users (e.g. a health check) never pay for it
+_CORE_EXPORTS = frozenset((
+    "create_video_with_subtitles_onestep",
+    "merge_audio_image_to_video_with_effects",
+    "add_subtitles_to_video",
+    "add_subtitles_to_video_portrait",
+    "AfterEffectsProcess",
+    "get_local_font",
+    "get_output_filename",
+    "EFFECTS"
+))
+
+
+def __getattr__(name):
+    if name in _CORE_EXPORTS:
+        from . import core_functions
+        return getattr(core_functions, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     "create_video_with_subtitles_onestep",
     "merge_audio_image_to_video_with_effects", 
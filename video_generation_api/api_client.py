@@ -4,11 +4,31 @@ Python client for Video Generation API
 
 import os
 import base64
+import mmap
 import requests
 import time
+from contextlib import ExitStack
 from typing import Optional, List, Dict, Union
 from pathlib import Path
 
+# SIMD (SSSE3/AVX2/AVX-512) base64 codec when available, stdlib otherwise
+try:
+    import pybase64 as b64
+except ImportError:
+    b64 = base64
+
+if hasattr(b64, 'b64encode_as_string'):
+    _b64encode_as_string = b64.b64encode_as_string
+else:
+    def _b64encode_as_string(data):
+        return b64.b64encode(data).decode('ascii')
+
+# Files that cannot be memory mapped are base64 encoded in blocks of this many
+# bytes (a multiple of 3, so no block but the last produces padding)
+ENCODE_BLOCK_BYTES = 3 * 19 * 1024
+# Downloaded videos are written to disk in chunks of this many bytes
+DOWNLOAD_CHUNK_BYTES = 1024 * 1024
+
 
 class VideoGenerationClient:
     """
@@ -40,9 +60,34 @@ class VideoGenerationClient:
             self.headers["X-Authentication-Key"] = auth_key
     
     def _encode_file(self, file_path: str) -> str:
-        """Encode file to base64"""
+        """Encode file to base64 straight from a memory map, without reading it into memory first"""
         with open(file_path, 'rb') as f:
-            return base64.b64encode(f.read()).decode('utf-8')
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped
+                return ''
+            except OSError:
+                # Pipes and other unmappable files are read block by block
+                return ''.join(
+                    _b64encode_as_string(block)
+                    for block in iter(lambda: f.read(ENCODE_BLOCK_BYTES), b'')
+                )
+            with data:
+                return _b64encode_as_string(data)
+    
+    def _auth_headers(self) -> Dict:
+        """Headers for requests whose body is not JSON"""
+        return {k: v for k, v in self.headers.items() if k != "Content-Type"}
+    
+    @staticmethod
+    def _form_fields(data: Dict) -> List[tuple]:
+        """Request parameters as multipart form fields, lists become repeated fields"""
+        fields = []
+        for key, value in data.items():
+            for item in (value if isinstance(value, list) else [value]):
+                fields.append((key, str(item).lower() if isinstance(item, bool) else str(item)))
+        return fields
     
     def health_check(self) -> Dict:
         """Check API health status"""
@@ -63,8 +108,11 @@ class VideoGenerationClient:
         outline_color: str = "&H00000000",
         is_portrait: Optional[bool] = None,
         watermark_path: Optional[str] = None,
+        use_gpu: Optional[bool] = None,
         output_path: str = "output.mp4",
-        timeout: int = 300
+        timeout: int = 300,
+        poll_interval: float = 2.0,
+        multipart: bool = True
     ) -> Dict:
         """
         Create video with all options
@@ -81,16 +129,25 @@ class VideoGenerationClient:
             outline_color: Subtitle outline color in ASS format
             is_portrait: Force portrait orientation
             watermark_path: Optional watermark image
+            use_gpu: Set False to force CPU (libx264) encoding; the server uses NVENC when available
             output_path: Local path to save the output video
-            timeout: Request timeout in seconds
+            timeout: Maximum seconds to wait for the video to be rendered
+            poll_interval: Seconds between job status checks
+            multipart: Upload files as multipart/form-data (raw bytes, no base64);
+                       False sends them base64 encoded in a JSON body
             
         Returns:
             Dict with success status and file information
         """
-        # Prepare request data
+        # Input files by API field, sent as raw multipart files or base64 strings
+        input_files = {"input_image": image_path, "input_audio": audio_path}
+        if subtitle_path:
+            input_files["subtitle"] = subtitle_path
+        if watermark_path:
+            input_files["watermark"] = watermark_path
+        
+        # Prepare request parameters
         data = {
-            "input_image": self._encode_file(image_path),
-            "input_audio": self._encode_file(audio_path),
             "language": language,
             "background_box": background_box,
             "background_opacity": background_opacity,
@@ -98,8 +155,6 @@ class VideoGenerationClient:
         }
         
         # Add optional parameters
-        if subtitle_path:
-            data["subtitle"] = self._encode_file(subtitle_path)
         if effects:
             data["effects"] = effects
         if font_size:
@@ -108,33 +163,80 @@ class VideoGenerationClient:
             data["outline_color"] = outline_color
         if is_portrait is not None:
             data["is_portrait"] = is_portrait
-        if watermark_path:
-            data["watermark"] = self._encode_file(watermark_path)
+        if use_gpu is not None:
+            data["use_gpu"] = use_gpu
         
         # Make request
-        response = requests.post(
-            f"{self.api_url}/create_video_onestep",
-            json=data,
-            headers=self.headers,
-            timeout=timeout
-        )
+        if multipart:
+            with ExitStack() as stack:
+                files = {
+                    field: (os.path.basename(path), stack.enter_context(open(path, 'rb')))
+                    for field, path in input_files.items()
+                }
+                response = requests.post(
+                    f"{self.api_url}/create_video_onestep",
+                    data=self._form_fields(data),
+                    files=files,
+                    headers=self._auth_headers(),
+                    timeout=timeout
+                )
+        else:
+            for field, path in input_files.items():
+                data[field] = self._encode_file(path)
+            response = requests.post(
+                f"{self.api_url}/create_video_onestep",
+                json=data,
+                headers=self.headers,
+                timeout=timeout
+            )
         response.raise_for_status()
         result = response.json()
         
+        # Rendering runs as a queued job, wait for it to finish
+        if result.get("job_id") and not result.get("download_endpoint"):
+            result = self.wait_for_job(result["job_id"], timeout=timeout, poll_interval=poll_interval)
+        
         if result.get("success"):
             # Download the video
             download_url = f"{self.api_url}{result['download_endpoint']}"
-            video_response = requests.get(download_url, timeout=60)
-            video_response.raise_for_status()
-            
-            # Save to file
-            with open(output_path, 'wb') as f:
-                f.write(video_response.content)
+            # Stream to disk so the video is never held in memory as a whole
+            with requests.get(download_url, timeout=60, stream=True) as video_response:
+                video_response.raise_for_status()
+                with open(output_path, 'wb') as f:
+                    for chunk in video_response.iter_content(chunk_size=DOWNLOAD_CHUNK_BYTES):
+                        f.write(chunk)
             
             result["local_path"] = output_path
         
         return result
     
+    def get_job_status(self, job_id: str) -> Dict:
+        """Get the status of a queued video job"""
+        response = requests.get(f"{self.api_url}/jobs/{job_id}", headers=self.headers)
+        response.raise_for_status()
+        return response.json()
+    
+    def wait_for_job(self, job_id: str, timeout: int = 300, poll_interval: float = 2.0) -> Dict:
+        """
+        Poll a video job until it completes or fails
+        
+        Args:
+            job_id: Job ID returned by create_video_onestep
+            timeout: Maximum seconds to wait
+            poll_interval: Seconds between status checks
+            
+        Returns:
+            Dict with the final job status and file information
+        """
+        deadline = time.time() + timeout
+        while True:
+            status = self.get_job_status(job_id)
+            if status.get("status") in ("completed", "failed"):
+                return status
+            if time.time() > deadline:
+                raise TimeoutError(f"Job {job_id} did not finish within {timeout} seconds")
+            time.sleep(poll_interval)
+    
     def create_baseline_video(
         self,
         image_path: str,
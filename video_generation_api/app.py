@@ -6,15 +6,23 @@ Secure Flask API for video processing with optional authentication
 
 import os
 import sys
-import base64
+import binascii
 import json
+import hashlib
 import tempfile
 import re
 import shutil
 import uuid
-from datetime import datetime, timedelta
+import time
+import queue
+import threading
+import errno
+import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from functools import wraps
-from flask import Flask, request, jsonify, send_file, url_for
+from typing import TypedDict
+from flask import Flask, Response, request, jsonify, send_file, url_for
+from flask.json.provider import DefaultJSONProvider
 import subprocess
 
 # Import core functions from same package
@@ -22,14 +30,77 @@ from .core_functions import (
     create_video_with_subtitles_onestep,
     merge_audio_image_to_video_with_effects,
     add_subtitles_to_video,
-    add_subtitles_to_video_portrait
+    add_subtitles_to_video_portrait,
+    warm_up
 )
+from .metadata_store import create_metadata_store
+from .object_storage import create_object_storage
+from .job_processor import JobProcessor, TranscodeJob, QueueFullError
+
+# SIMD (SSSE3/AVX2/AVX-512) base64 codec when available, stdlib otherwise.
+# Both skip characters outside the alphabet like b64decode(validate=False)
+try:
+    import pybase64
+    b64decode = pybase64.b64decode
+except ImportError:
+    # What base64.b64decode calls, without its ASCII copy of every str slice
+    b64decode = binascii.a2b_base64
+
+# SIMD JSON parser/serializer when available, Flask's stdlib provider otherwise
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 # Create Flask app
 app = Flask(__name__)
 
+if orjson is not None:
+    class OrjsonProvider(DefaultJSONProvider):
+        """Flask JSON provider backed by orjson, used by request.get_json() and jsonify()"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj, default=self.default).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+        def response(self, *args, **kwargs):
+            # Build the body as bytes directly, skipping the str round trip
+            obj = self._prepare_response_obj(args, kwargs)
+            return self._app.response_class(orjson.dumps(obj, default=self.default), mimetype=self.mimetype)
+
+    app.json = OrjsonProvider(app)
+# Reject oversized uploads before they are buffered (HTTP 413)
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_FILE_SIZE_MB', 500)) * 1024 * 1024
+
+# Base64 is decoded in slices of this many characters (must be a multiple of 4)
+BASE64_CHUNK_CHARS = 4 * 64 * 1024
+# Characters a lenient (validate=False) decode skips, e.g. MIME line breaks
+_BASE64_JUNK_RE = re.compile(r'[^A-Za-z0-9+/=]+')
+
+# Longest string treated as a local file path (PATH_MAX on Linux)
+MAX_PATH_LENGTH = 4096
+
+# Inputs of the creation endpoint as (field, file name in the work directory, required),
+# in the order _create_video_job takes them
+INPUT_SPECS = (
+    ('input_image', 'input.png', True),
+    ('input_audio', 'input.mp3', True),
+    ('subtitle', 'subtitle.srt', False),
+    ('watermark', 'watermark.png', False),
+)
+
+# Upload fields accepted by the creation endpoint, as multipart files or base64 strings
+UPLOAD_FIELDS = tuple(field for field, _, _ in INPUT_SPECS)
+# The same inputs referenced as s3://bucket/key URLs, fetched straight to disk
+S3_INPUT_FIELDS = tuple(f"{field}_s3" for field in UPLOAD_FIELDS)
+
 # Authentication Configuration
 DEFAULT_AUTH_KEY = "your-authentication-key-placeholder-uuid-here"
+# Read once, the environment is fixed for the lifetime of a worker
+AUTHENTICATION_KEY = os.getenv('AUTHENTICATION_KEY', DEFAULT_AUTH_KEY)
+AUTH_MODE = "default" if AUTHENTICATION_KEY == DEFAULT_AUTH_KEY else "secure"
 
 def check_authentication():
     """
@@ -37,15 +108,13 @@ def check_authentication():
     - If AUTHENTICATION_KEY is placeholder value → Allow all requests (default mode)
     - If AUTHENTICATION_KEY is custom value → Verify header (secure mode)
     """
-    config_auth_key = os.getenv('AUTHENTICATION_KEY', DEFAULT_AUTH_KEY)
-    
     # Default mode: using placeholder, no authentication required
-    if config_auth_key == DEFAULT_AUTH_KEY:
+    if AUTH_MODE == "default":
         return True, "Default mode - open access"
     
     # Secure mode: verify header key
     request_auth_key = request.headers.get('X-Authentication-Key')
-    if request_auth_key == config_auth_key:
+    if request_auth_key == AUTHENTICATION_KEY:
         return True, "Authenticated successfully"
     else:
         return False, "Invalid authentication key"
@@ -57,20 +126,105 @@ def save_input_file(data, work_dir, filename):
     
     file_path = os.path.join(work_dir, filename)
     
-    # If it's a file path
-    if isinstance(data, str) and os.path.exists(data):
+    # If it's a file path (base64 payloads are far longer than PATH_MAX, skip the
+    # stat and the filesystem encoding of a multi-MB string for them)
+    if isinstance(data, str) and len(data) < MAX_PATH_LENGTH and os.path.exists(data):
         shutil.copy(data, file_path)
     else:
         # Assume it's base64 encoded
         try:
-            decoded_data = base64.b64decode(data)
-            with open(file_path, 'wb') as f:
-                f.write(decoded_data)
+            _write_base64(data, file_path)
         except Exception as e:
             raise ValueError(f"Failed to decode base64 data for {filename}: {e}")
     
     return file_path
 
+def _write_base64(data, file_path):
+    """Decode base64 to disk slice by slice instead of materializing the whole payload"""
+    # Unbuffered: every decoded slice goes out as a single write(2), no extra copy
+    with open(file_path, 'wb', buffering=0) as f:
+        # Reserve the decoded size up front so the filesystem allocates extents once
+        if hasattr(os, 'posix_fallocate') and data:
+            try:
+                os.posix_fallocate(f.fileno(), 0, len(data) * 3 // 4)
+            except OSError:
+                pass
+        try:
+            for start in range(0, len(data), BASE64_CHUNK_CHARS):
+                f.write(b64decode(data[start:start + BASE64_CHUNK_CHARS]))
+        except binascii.Error:
+            # Line breaks or whitespace shift the 4-character groups, regroup them
+            f.seek(0)
+            _write_base64_regrouped(data, f)
+        # Drop the part of the reservation not covered by decoded bytes
+        f.truncate()
+
+def _write_base64_regrouped(data, f):
+    """Decode base64 with non-alphabet characters slice by slice, carrying partial groups over"""
+    carry = ''
+    for start in range(0, len(data), BASE64_CHUNK_CHARS):
+        chunk = carry + _BASE64_JUNK_RE.sub('', data[start:start + BASE64_CHUNK_CHARS])
+        usable = len(chunk) - len(chunk) % 4
+        f.write(b64decode(chunk[:usable]))
+        carry = chunk[usable:]
+    if carry:
+        # Raises binascii.Error for a truncated final group, like a one-pass decode
+        f.write(b64decode(carry))
+
+def save_request_input(data, files, field, work_dir, filename):
+    """Save a multipart upload or S3 object streamed to disk, falling back to base64/path in the form or JSON body"""
+    upload = files.get(field)
+    if upload:
+        file_path = os.path.join(work_dir, filename)
+        upload.save(file_path)
+        return file_path
+    s3_url = data.get(f"{field}_s3")
+    if s3_url:
+        return require_object_storage(f"{field}_s3").download(s3_url, os.path.join(work_dir, filename))
+    return save_input_file(data.get(field), work_dir, filename)
+
+def has_request_input(data, files, field):
+    """Whether an optional input was sent as an upload, an S3 URL or base64/path"""
+    return bool(files.get(field) or data.get(f"{field}_s3") or data.get(field))
+
+def require_object_storage(field):
+    """
+    Object storage for a request field that references S3
+    
+    Raises:
+        ValueError: If the 'boto3' package is not installed
+    """
+    if object_storage is None:
+        raise ValueError(f"{field} requires the 'boto3' package on the server")
+    return object_storage
+
+def _parse_form_bool(value):
+    return value.strip().lower() in ('1', 'true', 'yes', 'on')
+
+def _parse_form_int(value):
+    return int(value) if value else None
+
+# Converters for typed multipart form fields, other fields stay strings
+FORM_PARAM_PARSERS = {
+    'background_box': _parse_form_bool,
+    'is_portrait': _parse_form_bool,
+    'use_gpu': _parse_form_bool,
+    'background_opacity': float,
+    'font_size': _parse_form_int,
+}
+
+def parse_form_params(form):
+    """Convert multipart form fields to the same types as the JSON body"""
+    params = {}
+    for key in form:
+        if key == 'effects':
+            # Repeated and comma-separated values both become one list
+            params[key] = [e.strip() for v in form.getlist(key) for e in v.split(',') if e.strip()]
+            continue
+        parse = FORM_PARAM_PARSERS.get(key)
+        params[key] = parse(form[key]) if parse else form[key]
+    return params
+
 
 def require_auth(f):
     """Decorator: Add authentication check to API endpoints"""
@@ -93,8 +247,185 @@ TEMP_DIR = './temp'
 os.makedirs(OUTPUT_DIR, exist_ok=True)
 os.makedirs(TEMP_DIR, exist_ok=True)
 
-# Store file metadata (in production, use Redis or database)
-file_metadata = {}
+# When both directories share a filesystem, finished videos are renamed into place
+SAME_FILESYSTEM = os.stat(TEMP_DIR).st_dev == os.stat(OUTPUT_DIR).st_dev
+
+# Work directories are removed in the background so responses do not wait on the walk
+_cleanup_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='workdir-cleanup')
+
+def move_output(src, dst):
+    """Move a rendered video into OUTPUT_DIR, renaming instead of copying when possible"""
+    if SAME_FILESYSTEM:
+        try:
+            os.replace(src, dst)
+            return
+        except OSError as e:
+            # src may live outside TEMP_DIR (e.g. a processor's own output path)
+            if e.errno != errno.EXDEV:
+                raise
+    # Hard links cannot span filesystems either, so a copy is unavoidable here
+    shutil.move(src, dst)
+
+def clear_dir(path):
+    """Remove the contents of a directory, keeping the directory itself"""
+    for entry in os.scandir(path):
+        if entry.is_dir(follow_symlinks=False):
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.unlink(entry.path)
+
+def _remove_stale_worker_dirs(temp_dir):
+    """Remove slot directories left behind by worker processes that have exited"""
+    for entry in os.scandir(temp_dir):
+        if not entry.name.startswith('worker_'):
+            continue
+        try:
+            os.kill(int(entry.name[len('worker_'):]), 0)
+        except ValueError:
+            continue
+        except ProcessLookupError:
+            shutil.rmtree(entry.path, ignore_errors=True)
+        except PermissionError:
+            # Process exists but belongs to another user
+            continue
+
+class WorkDirPool:
+    """
+    Fixed set of reusable work directories under TEMP_DIR/worker_<pid>/
+    One slot per running or queued job, which also caps the scratch space in use
+    
+    Released slots are cleared in the background, but stay available meanwhile:
+    acquire() clears one itself when no cleared slot is left
+    """
+
+    def __init__(self, root, size):
+        self._free = queue.Queue()
+        self._released = queue.Queue()
+        for i in range(size):
+            path = os.path.join(root, f"worker_{os.getpid()}", f"slot_{i}")
+            os.makedirs(path, exist_ok=True)
+            clear_dir(path)
+            self._free.put(path)
+
+    def acquire(self):
+        """
+        Take an empty work directory
+        
+        Raises:
+            QueueFullError: If every slot is held by a running or queued job
+        """
+        try:
+            return self._free.get_nowait()
+        except queue.Empty:
+            pass
+        try:
+            path = self._released.get_nowait()
+        except queue.Empty:
+            raise QueueFullError("No free work directory, too many jobs in progress")
+        clear_dir(path)
+        return path
+
+    def release(self, path):
+        """Return a work directory to the pool and schedule clearing of its contents"""
+        self._released.put(path)
+        _cleanup_executor.submit(self._clear_released)
+
+    def _clear_released(self):
+        try:
+            path = self._released.get_nowait()
+        except queue.Empty:
+            # acquire() already took and cleared it
+            return
+        try:
+            clear_dir(path)
+        finally:
+            self._free.put(path)
+
+def release_work_dir(work_dir):
+    """Return a request work directory to the pool so its slot can be reused"""
+    work_dir_pool.release(work_dir)
+
+# File metadata lives in Redis when REDIS_HOST is set (shared across workers,
+# expired natively via TTL), otherwise in an in-process dictionary
+metadata_store = create_metadata_store()
+# S3-compatible storage for *_s3 inputs and output_s3, None without boto3
+object_storage = create_object_storage()
+METADATA_PREFIX = 'vid:'
+JOB_PREFIX = 'job:'
+FILE_TTL_SECONDS = int(float(os.environ.get('FILE_RETENTION_HOURS', 1)) * 3600)
+
+# Internal nginx location for OUTPUT_DIR, e.g. /internal_downloads/ (unset: serve from Python)
+X_ACCEL_REDIRECT_PREFIX = os.environ.get('X_ACCEL_REDIRECT_PREFIX', '')
+
+# Finished encodes keyed by a hash of their inputs, 0 disables the cache
+ENCODE_CACHE_PREFIX = 'encode_cache:'
+# The sweep deletes an output once its own metadata expires, so a cache entry
+# cannot outlive FILE_TTL_SECONDS without pointing at a removed file
+ENCODE_CACHE_TTL_SECONDS = min(int(os.environ.get('ENCODE_CACHE_TTL_SECONDS', FILE_TTL_SECONDS)), FILE_TTL_SECONDS)
+# Parameters that do not change the rendered video
+UNCACHED_PARAMS = ('output_filename', 'output_s3')
+
+def compute_cache_key(params, input_paths):
+    """SHA-256 over the saved input files and the canonicalized request parameters"""
+    digest = hashlib.sha256()
+    for path in input_paths:
+        if not path:
+            digest.update(b'-;')
+            continue
+        # Length prefix keeps the concatenation of different inputs unambiguous
+        digest.update(f"{os.path.getsize(path)};".encode())
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(block)
+    canonical = {k: v for k, v in params.items() if k not in UNCACHED_PARAMS}
+    digest.update(json.dumps(canonical, sort_keys=True).encode())
+    return digest.hexdigest()
+
+def link_cached_output(cache_key, final_output):
+    """Hard link a previous encode of identical inputs to final_output, False on a cache miss"""
+    if not ENCODE_CACHE_TTL_SECONDS:
+        return False
+    key = f"{ENCODE_CACHE_PREFIX}{cache_key}"
+    entry = metadata_store.get(key)
+    if not entry:
+        return False
+    try:
+        os.link(os.path.join(OUTPUT_DIR, entry['filename']), final_output)
+    except OSError:
+        # The cached file was already cleaned up
+        metadata_store.delete(key)
+        return False
+    return True
+
+def detect_ffmpeg_version():
+    """First line of `ffmpeg -version`, or "Not installed" """
+    try:
+        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return "Not installed"
+    return result.stdout.split('\n', 1)[0] if result.returncode == 0 else "Not installed"
+
+# The FFmpeg binary and GPU devices do not change within a container lifetime,
+# so /health reports values probed once at startup
+FFMPEG_VERSION = detect_ffmpeg_version()
+GPU_AVAILABLE = os.path.exists('/dev/nvidia0')
+
+def detect_nvenc():
+    """Check once at startup for an NVIDIA device and an FFmpeg build with h264_nvenc"""
+    if not GPU_AVAILABLE:
+        return False
+    try:
+        result = subprocess.run(['ffmpeg', '-hide_banner', '-encoders'], capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return False
+    return result.returncode == 0 and 'h264_nvenc' in result.stdout
+
+# Encode on the GPU by default when NVENC is usable, requests may opt out with use_gpu=false
+NVENC_AVAILABLE = detect_nvenc()
+
+# Font lookups and the NVENC test encode run in the background at startup,
+# not inside the first job
+threading.Thread(target=warm_up, kwargs={'use_gpu': NVENC_AVAILABLE}, name='warmup', daemon=True).start()
 
 def detect_video_orientation(video_path):
     """
@@ -112,7 +443,7 @@ def detect_video_orientation(video_path):
         
         result = subprocess.run(cmd, capture_output=True, text=True)
         if result.returncode != 0:
-            app.logger.error(f"ffprobe failed: {result.stderr}")
+            app.logger.error("ffprobe failed: %s", result.stderr)
             return False
             
         data = json.loads(result.stdout)
@@ -122,54 +453,52 @@ def detect_video_orientation(video_path):
             
             # Video is portrait if height > width
             is_portrait = height > width
-            app.logger.info(f"Video dimensions: {width}x{height}, portrait: {is_portrait}")
+            app.logger.info("Video dimensions: %dx%d, portrait: %s", width, height, is_portrait)
             return is_portrait
         
         return False
         
     except Exception as e:
-        app.logger.error(f"Error detecting video orientation: {e}")
+        app.logger.error("Error detecting video orientation: %s", e)
         return False
 
+# Every field of the health response is fixed once startup probing is done,
+# so the body is serialized once instead of per probe
+AVAILABLE_ENDPOINTS = (
+    "/create_video_onestep",
+    "/create_videos_batch",
+    "/jobs/<job_id>",
+    "/download/<file_id>",
+    "/cleanup"
+)
+
+def _build_health_response():
+    """Health payload with the startup probe results and authentication status"""
+    response = {
+        "status": "healthy",
+        "ffmpeg_version": FFMPEG_VERSION,
+        "gpu_available": GPU_AVAILABLE,
+        "nvenc_available": NVENC_AVAILABLE,
+        "output_dir": OUTPUT_DIR,
+        "temp_dir": TEMP_DIR,
+        "authentication": {
+            "mode": AUTH_MODE,
+            "description": "Open access - no authentication required" if AUTH_MODE == "default" 
+                          else "Secure mode - X-Authentication-Key header required"
+        },
+        "available_endpoints": list(AVAILABLE_ENDPOINTS)
+    }
+    
+    if AUTH_MODE == "secure":
+        response["authentication"]["required_header"] = "X-Authentication-Key"
+    return response
+
+HEALTH_BODY = app.json.dumps(_build_health_response())
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint with authentication status"""
-    try:
-        import subprocess
-        result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
-        ffmpeg_version = result.stdout.split('\n')[0] if result.returncode == 0 else "Not installed"
-        
-        # Check GPU
-        gpu_available = os.path.exists('/dev/nvidia0')
-        
-        # Check authentication status
-        config_auth_key = os.getenv('AUTHENTICATION_KEY', DEFAULT_AUTH_KEY)
-        auth_mode = "default" if config_auth_key == DEFAULT_AUTH_KEY else "secure"
-        
-        response = {
-            "status": "healthy",
-            "ffmpeg_version": ffmpeg_version,
-            "gpu_available": gpu_available,
-            "output_dir": OUTPUT_DIR,
-            "temp_dir": TEMP_DIR,
-            "authentication": {
-                "mode": auth_mode,
-                "description": "Open access - no authentication required" if auth_mode == "default" 
-                              else "Secure mode - X-Authentication-Key header required"
-            },
-            "available_endpoints": [
-                "/create_video_onestep",
-                "/download/<file_id>",
-                "/cleanup"
-            ]
-        }
-        
-        if auth_mode == "secure":
-            response["authentication"]["required_header"] = "X-Authentication-Key"
-            
-        return jsonify(response)
-    except Exception as e:
-        return jsonify({"status": "error", "error": str(e)}), 500
+    return app.response_class(HEALTH_BODY, mimetype='application/json')
 
 @app.route('/create_video_onestep', methods=['POST'])
 @require_auth
@@ -181,240 +510,423 @@ def create_video_onestep_api():
     2. Subtitles Only: No effects, with subtitles -> create_basic_video + add_subtitles
     3. Effects Only: With effects, no subtitles -> merge_audio_image
     4. Full Featured: With effects and subtitles -> merge_audio_image + add_subtitles
+    
+    Accepts multipart/form-data (files streamed to disk) or a JSON body with
+    base64 encoded files. The video is rendered asynchronously: the response
+    carries a job_id to poll at /jobs/<job_id>, or HTTP 429 when the job queue is full.
     """
     try:
-        data = request.get_json()
-        if not data:
+        if request.mimetype == 'multipart/form-data':
+            data = parse_form_params(request.form)
+            files = request.files
+        else:
+            # cache=False so the raw body is not kept alongside the parsed JSON
+            data = request.get_json(cache=False)
+            files = {}
+        if not data and not files:
             return jsonify({"error": "No JSON data provided"}), 400
         
-        # Create work directory
-        work_id = datetime.now().strftime('%Y%m%d_%H%M%S_%f')
-        work_dir = os.path.join(TEMP_DIR, work_id)
-        os.makedirs(work_dir, exist_ok=True)
+        try:
+            job = submit_video_job(data, files)
+        except QueueFullError as e:
+            return jsonify({"error": str(e), "event": "queue:full"}), 429
         
-        # Process input files
-        is_portrait = data.get('is_portrait')
-        input_image = save_input_file(data.get('input_image'), work_dir, 'input.png')
-        input_audio = save_input_file(data.get('input_audio'), work_dir, 'input.mp3')
-        subtitle_path = save_input_file(data.get('subtitle'), work_dir, 'subtitle.srt') if data.get('subtitle') else None
-        watermark_path = save_input_file(data.get('watermark'), work_dir, 'watermark.png') if data.get('watermark') else None
+        return jsonify({
+            "success": True,
+            "job_id": job.job_id,
+            "status": "queued",
+            "status_endpoint": f"/jobs/{job.job_id}"
+        }), 202
+            
+    except Exception as e:
+        app.logger.error("Exception in unified create_video_onestep: %s", e, exc_info=True)
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/create_videos_batch', methods=['POST'])
+@require_auth
+def create_videos_batch_api():
+    """
+    Queue several videos in one request
+    
+    Body: {"jobs": [{...create_video_onestep fields...}, ...]}
+    Streams one application/x-ndjson line per job in completion order, so
+    clients can fetch each video without waiting for the slowest one.
+    """
+    data = request.get_json(cache=False)
+    specs = data.get('jobs') if isinstance(data, dict) else None
+    if not specs or not isinstance(specs, list):
+        return jsonify({"error": "Request body must contain a non-empty 'jobs' array"}), 400
+    
+    futures = {}
+    rejected = []
+    for index, spec in enumerate(specs):
+        try:
+            job = submit_video_job(spec, {})
+        except QueueFullError as e:
+            rejected.append({"index": index, "success": False, "error": str(e), "event": "queue:full"})
+        except Exception as e:
+            rejected.append({"index": index, "success": False, "error": str(e)})
+        else:
+            futures[job.future] = (index, job.job_id)
+    
+    def generate():
+        for line in rejected:
+            yield app.json.dumps(line) + "\n"
+        for future in as_completed(futures):
+            index, job_id = futures[future]
+            try:
+                line = {"index": index, "job_id": job_id, "status": "completed", **future.result()}
+            except Exception as e:
+                line = {"index": index, "job_id": job_id, "status": "failed", "success": False, "error": str(e)}
+            yield app.json.dumps(line) + "\n"
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+def submit_video_job(data, files):
+    """
+    Save the inputs of one video request to a new work directory and queue it
+    
+    Returns:
+        TranscodeJob: The queued job, its job_id is also the file ID
+    
+    Raises:
+        QueueFullError: If the job queue is at capacity
+        ValueError: If an input cannot be saved
+    """
+    # One random ID names the output file and the job
+    file_id = uuid.uuid4().hex
+    work_dir = work_dir_pool.acquire()
+    
+    try:
+        if data.get('output_s3'):
+            require_object_storage('output_s3')
         
-        # Generate unique file ID
-        file_id = str(uuid.uuid4())
-        output_filename = f"{file_id}.mp4"
+        # Process input files, optional ones that were not sent become None
+        input_paths = [
+            save_request_input(data, files, field, work_dir, filename)
+            if required or has_request_input(data, files, field) else None
+            for field, filename, required in INPUT_SPECS
+        ]
         
-        # Determine processing path based on parameters
-        effects = data.get('effects', [])
-        has_effects = bool(effects)
-        has_subtitles = bool(subtitle_path)
+        # Base64 payloads and S3 objects are already on disk, keep only the parameters
+        params = {k: v for k, v in data.items() if k not in UPLOAD_FIELDS and k not in S3_INPUT_FIELDS}
         
-        app.logger.info(f"Processing request - Effects: {has_effects}, Subtitles: {has_subtitles}")
+        job = TranscodeJob(_create_video_job, params, work_dir, file_id, *input_paths, job_id=file_id)
+        job_processor.submit(job)
+    except Exception:
+        release_work_dir(work_dir)
+        raise
+    return job
+
+class _JobResultFields(TypedDict):
+    success: bool
+    file_id: str
+    download_endpoint: str
+    filename: str
+    size: int
+    scenario: str
+
+class JobResult(_JobResultFields, total=False):
+    """Result payload of a completed video job, exposed through /jobs/<job_id>"""
+    # Presigned URL of the copy uploaded to output_s3
+    video_url: str
+
+# Processing scenario keyed by (has_effects, has_subtitles)
+SCENARIOS = {
+    (False, False): "baseline",
+    (False, True): "subtitles_only",
+    (True, False): "effects_only",
+    (True, True): "full_featured",
+}
+
+def _create_video_job(data, work_dir, file_id, input_image, input_audio, subtitle_path, watermark_path) -> JobResult:
+    """
+    Render one video for create_video_onestep on a job worker thread
+    
+    Returns:
+        JobResult: Result payload exposed through /jobs/<job_id>
+    
+    Raises:
+        RuntimeError: If any processing step fails
+    """
+    try:
+        output_filename = f"{file_id}.mp4"
+        final_output = os.path.join(OUTPUT_DIR, output_filename)
+        has_effects = bool(data.get('effects', []))
+        has_subtitles = bool(subtitle_path)
         
-        # Step 1: Create base video (with or without effects)
-        base_video_path = os.path.join(work_dir, "base_video.mp4")
+        app.logger.info("Processing request - Effects: %s, Subtitles: %s", has_effects, has_subtitles)
         
-        if has_effects:
-            # Use merge_audio_image for effects
-            app.logger.info("Using merge_audio_image_to_video_with_effects for zoom/pan effects")
-            success, result = merge_audio_image_to_video_with_effects(
-                input_mp3=input_audio,
-                input_image=input_image,
-                output_video=base_video_path,
-                effects=effects,
-                watermark_path=watermark_path
-            )
-            
-            if not success:
-                shutil.rmtree(work_dir)
-                return jsonify({"error": f"Video creation with effects failed: {result}"}), 500
-                
-            # The result is the actual output path
-            if result != base_video_path:
-                base_video_path = result
-                
+        # Identical inputs and parameters reuse a previous encode instead of running FFmpeg again
+        cache_key = compute_cache_key(data, (input_image, input_audio, subtitle_path, watermark_path))
+        if link_cached_output(cache_key, final_output):
+            app.logger.info("Reusing cached encode %.12s for %s", cache_key, file_id)
         else:
-            # Use basic video creation (no effects) - using the existing function but without effects
-            app.logger.info("Creating basic video without effects")
-            success = create_video_with_subtitles_onestep(
-                input_image=input_image,
-                input_audio=input_audio,
-                subtitle_path=None,  # No subtitles in first step
-                output_video=base_video_path,
-                font_size=None,
-                outline_color=None,
-                background_box=False,
-                background_opacity=0,
-                language='english',
-                is_portrait=is_portrait,
-                effects=None,  # No effects
-                watermark_path=watermark_path,
-                progress_callback=lambda msg: app.logger.debug(f"Progress: {msg}")
-            )
-            
-            if not success:
-                shutil.rmtree(work_dir)
-                return jsonify({"error": "Basic video creation failed"}), 500
+            _render_video(data, work_dir, final_output, input_image, input_audio, subtitle_path, watermark_path)
         
-        # Step 2: Add subtitles if requested
-        final_output = os.path.join(OUTPUT_DIR, output_filename)
+        # Verify final output exists
+        if not os.path.exists(final_output):
+            raise RuntimeError("Final video file not found")
         
-        if has_subtitles:
-            app.logger.info("Adding subtitles to video")
-            
-            # Detect video orientation
-            
-            if is_portrait is None:
-                # Auto-detect orientation
-                is_portrait = detect_video_orientation(base_video_path)
-                app.logger.info(f"Auto-detected video orientation - Portrait: {is_portrait}")
-            
-            # Choose appropriate subtitle function
-            if is_portrait:
-                app.logger.info("Using add_subtitles_to_video_portrait for portrait video")
-                success = add_subtitles_to_video_portrait(
-                    input_video_path=base_video_path,
-                    subtitle_path=subtitle_path,
-                    output_video_path=final_output,
-                    font_size=data.get('font_size'),
-                    outline_color=data.get('outline_color', "&H00000000"),
-                    background_box=data.get('background_box', True),
-                    background_opacity=data.get('background_opacity', 0.2),
-                    language=data.get('language', 'chinese')
-                )
-            else:
-                app.logger.info("Using add_subtitles_to_video for landscape video")
-                success = add_subtitles_to_video(
-                    input_video_path=base_video_path,
-                    subtitle_path=subtitle_path,
-                    output_video_path=final_output,
-                    font_size=data.get('font_size'),
-                    outline_color=data.get('outline_color', "&H00000000"),
-                    background_box=data.get('background_box', True),
-                    background_opacity=data.get('background_opacity', 0.2),
-                    language=data.get('language', 'chinese')
-                )
-                
-            if not success:
-                shutil.rmtree(work_dir)
-                return jsonify({"error": "Adding subtitles failed"}), 500
-        else:
-            # No subtitles, just move the base video to final output
-            app.logger.info("No subtitles requested, using base video as final output")
-            shutil.move(base_video_path, final_output)
+        file_size = os.path.getsize(final_output)
         
-        # Verify final output exists
-        if os.path.exists(final_output):
-            file_size = os.path.getsize(final_output)
-            
-            # Store metadata
-            file_metadata[file_id] = {
-                "filename": output_filename,
-                "original_name": data.get('output_filename', 'output.mp4'),
-                "size": file_size,
-                "created_at": datetime.now(),
-                "expires_at": datetime.now() + timedelta(hours=1)
-            }
-            
-            # Clean up work directory
-            shutil.rmtree(work_dir)
-            
-            # Generate download endpoint path (relative)
-            # Client should prepend their API base URL
-            download_endpoint = f"/download/{file_id}"
-            
-            # Log processing summary
-            # Recalculate for scenario detection
-            has_effects = bool(data.get('effects', []))
-            has_subtitles = bool(data.get('subtitle'))
-            
-            scenario = "unknown"
-            if not has_effects and not has_subtitles:
-                scenario = "baseline"
-            elif not has_effects and has_subtitles:
-                scenario = "subtitles_only"
-            elif has_effects and not has_subtitles:
-                scenario = "effects_only"
-            elif has_effects and has_subtitles:
-                scenario = "full_featured"
-                
-            app.logger.info(f"Successfully processed video - Scenario: {scenario}, Size: {file_size} bytes")
+        # Store metadata, expiration is tracked by the store TTL
+        metadata_store.set(f"{METADATA_PREFIX}{file_id}", {
+            "filename": output_filename,
+            "original_name": data.get('output_filename', 'output.mp4'),
+            "size": file_size,
+            "created_at": time.time()
+        }, FILE_TTL_SECONDS)
+        if ENCODE_CACHE_TTL_SECONDS:
+            # Point the cache at the newest copy, older links expire first
+            metadata_store.set(f"{ENCODE_CACHE_PREFIX}{cache_key}", {"filename": output_filename}, ENCODE_CACHE_TTL_SECONDS)
+        
+        # Generate download endpoint path (relative)
+        # Client should prepend their API base URL
+        download_endpoint = f"/download/{file_id}"
+        
+        # Log processing summary
+        scenario = SCENARIOS[has_effects, has_subtitles]
+        app.logger.info("Successfully processed video - Scenario: %s, Size: %d bytes", scenario, file_size)
+        
+        result = JobResult(
+            success=True,
+            file_id=file_id,
+            download_endpoint=download_endpoint,
+            filename=data.get('output_filename', 'output.mp4'),
+            size=file_size,
+            scenario=scenario
+        )
+        if data.get('output_s3'):
+            # Clients fetch the video from the bucket instead of through /download
+            result['video_url'] = object_storage.upload(final_output, data['output_s3'], FILE_TTL_SECONDS)
+            app.logger.info("Uploaded %s to %s", file_id, data['output_s3'])
+        return result
+    finally:
+        # Clean up work directory
+        release_work_dir(work_dir)
+
+def _noop(msg):
+    pass
+
+def _log_progress(msg):
+    app.logger.debug("Progress: %s", msg)
+
+def _render_video(data, work_dir, final_output, input_image, input_audio, subtitle_path, watermark_path):
+    """
+    Run the FFmpeg steps for one request and leave the result at final_output
+    
+    Raises:
+        RuntimeError: If any processing step fails
+    """
+    is_portrait = data.get('is_portrait')
+    use_gpu = NVENC_AVAILABLE and data.get('use_gpu', True) is not False
+    
+    # Determine processing path based on parameters
+    effects = data.get('effects', [])
+    has_effects = bool(effects)
+    has_subtitles = bool(subtitle_path)
+    
+    # Step 1: Create base video (with or without effects)
+    base_video_path = os.path.join(work_dir, "base_video.mp4")
+    
+    if has_effects:
+        # Use merge_audio_image for effects
+        app.logger.info("Using merge_audio_image_to_video_with_effects for zoom/pan effects")
+        success, result = merge_audio_image_to_video_with_effects(
+            input_mp3=input_audio,
+            input_image=input_image,
+            output_video=base_video_path,
+            effects=effects,
+            watermark_path=watermark_path,
+            use_gpu=use_gpu
+        )
+        
+        if not success:
+            raise RuntimeError(f"Video creation with effects failed: {result}")
             
-            return jsonify({
-                "success": True,
-                "file_id": file_id,
-                "download_endpoint": download_endpoint,
-                "filename": data.get('output_filename', 'output.mp4'),
-                "size": file_size,
-                "scenario": scenario
-            })
-        else:
-            shutil.rmtree(work_dir)
-            return jsonify({"error": "Final video file not found"}), 500
+        # The result is the actual output path
+        if result != base_video_path:
+            base_video_path = result
             
-    except Exception as e:
-        app.logger.error(f"Exception in unified create_video_onestep: {e}", exc_info=True)
-        if 'work_dir' in locals() and os.path.exists(work_dir):
-            shutil.rmtree(work_dir)
-        return jsonify({"error": str(e)}), 500
+    else:
+        # Use basic video creation (no effects) - using the existing function but without effects
+        app.logger.info("Creating basic video without effects")
+        success = create_video_with_subtitles_onestep(
+            input_image=input_image,
+            input_audio=input_audio,
+            subtitle_path=None,  # No subtitles in first step
+            output_video=base_video_path,
+            font_size=None,
+            outline_color=None,
+            background_box=False,
+            background_opacity=0,
+            language='english',
+            is_portrait=is_portrait,
+            effects=None,  # No effects
+            watermark_path=watermark_path,
+            progress_callback=_log_progress if app.logger.isEnabledFor(logging.DEBUG) else _noop,
+            use_gpu=use_gpu
+        )
+        
+        if not success:
+            raise RuntimeError("Basic video creation failed")
+    
+    # Step 2: Add subtitles if requested
+    if has_subtitles:
+        app.logger.info("Adding subtitles to video")
+        
+        # Detect video orientation
+        
+        if is_portrait is None:
+            # Auto-detect orientation
+            is_portrait = detect_video_orientation(base_video_path)
+            app.logger.info("Auto-detected video orientation - Portrait: %s", is_portrait)
+        
+        # Choose appropriate subtitle function, both take the same parameters
+        add_subtitles = add_subtitles_to_video_portrait if is_portrait else add_subtitles_to_video
+        app.logger.info("Using %s for %s video", add_subtitles.__name__, 'portrait' if is_portrait else 'landscape')
+        success = add_subtitles(
+            input_video_path=base_video_path,
+            subtitle_path=subtitle_path,
+            output_video_path=final_output,
+            font_size=data.get('font_size'),
+            outline_color=data.get('outline_color', "&H00000000"),
+            background_box=data.get('background_box', True),
+            background_opacity=data.get('background_opacity', 0.2),
+            language=data.get('language', 'chinese'),
+            use_gpu=use_gpu
+        )
+        
+        if not success:
+            raise RuntimeError("Adding subtitles failed")
+    else:
+        # No subtitles, just move the base video to final output
+        app.logger.info("No subtitles requested, using base video as final output")
+        move_output(base_video_path, final_output)
+
+def _record_job_status(job, status, result=None, error=None):
+    """Persist job status in the metadata store so any worker can answer /jobs/<job_id>"""
+    key = f"{JOB_PREFIX}{job.job_id}"
+    if status == "rejected":
+        metadata_store.delete(key)
+        return
+    mapping = {"status": status}
+    if result is not None:
+        mapping["result"] = app.json.dumps(result)
+    if error is not None:
+        mapping["error"] = error
+    metadata_store.set(key, mapping, FILE_TTL_SECONDS)
+
+# Bounded FFmpeg job queue, sized by VIDEO_MAX_CONCURRENT and VIDEO_MAX_QUEUE
+job_processor = JobProcessor(on_status=_record_job_status, logger=app.logger)
+
+_remove_stale_worker_dirs(TEMP_DIR)
+# One extra slot for the one the cleanup thread holds while clearing it
+work_dir_pool = WorkDirPool(TEMP_DIR, job_processor.max_workers + job_processor.max_queue + 1)
+
+@app.route('/jobs/<job_id>')
+@require_auth
+def job_status(job_id):
+    """Poll the status of a queued video job"""
+    record = metadata_store.get(f"{JOB_PREFIX}{job_id}")
+    if not record:
+        return jsonify({"error": "Job not found"}), 404
+    
+    response = {"job_id": job_id, "status": record["status"]}
+    if record.get("result"):
+        response.update(app.json.loads(record["result"]))
+    if record.get("error"):
+        response["error"] = record["error"]
+    return jsonify(response)
 
 @app.route('/download/<file_id>')
 def download_file(file_id):
     """Download generated video file"""
-    # Check if file exists in metadata
-    if file_id not in file_metadata:
-        return jsonify({"error": "File not found"}), 404
-    
-    metadata = file_metadata[file_id]
+    metadata = metadata_store.get(f"{METADATA_PREFIX}{file_id}")
     
-    # Check if file expired
-    if datetime.now() > metadata['expires_at']:
-        # Clean up expired file
-        file_path = os.path.join(OUTPUT_DIR, metadata['filename'])
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        del file_metadata[file_id]
-        return jsonify({"error": "File expired"}), 404
+    # Missing metadata means unknown or expired, the background sweep removes the file
+    if not metadata:
+        return jsonify({"error": "File not found or expired"}), 404
     
     file_path = os.path.join(OUTPUT_DIR, metadata['filename'])
     if os.path.exists(file_path):
+        if X_ACCEL_REDIRECT_PREFIX:
+            # nginx serves the file itself from an internal location mapped to OUTPUT_DIR
+            response = Response(mimetype='video/mp4')
+            response.headers['X-Accel-Redirect'] = f"{X_ACCEL_REDIRECT_PREFIX.rstrip('/')}/{metadata['filename']}"
+            response.headers.set('Content-Disposition', 'attachment', filename=metadata['original_name'])
+            return response
+        # Gunicorn's wsgi.file_wrapper streams the file with sendfile(2);
+        # conditional enables Range/If-Modified-Since for resumed downloads
         return send_file(
             file_path,
             mimetype='video/mp4',
             as_attachment=True,
-            download_name=metadata['original_name']
+            download_name=metadata['original_name'],
+            conditional=True,
+            max_age=3600
         )
     else:
         return jsonify({"error": "File not found on disk"}), 404
 
-@app.route('/cleanup')
-def cleanup_expired_files():
-    """Clean up expired files"""
-    cleaned = 0
-    current_time = datetime.now()
+def sweep_expired_outputs():
+    """
+    Remove output files whose metadata has expired
     
-    # Clean up expired files
-    expired_ids = []
-    for file_id, metadata in file_metadata.items():
-        if current_time > metadata['expires_at']:
-            file_path = os.path.join(OUTPUT_DIR, metadata['filename'])
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                cleaned += 1
-            expired_ids.append(file_id)
+    Returns:
+        int: Number of files removed
+    """
+    cleaned = 0
+    oldest_allowed = time.time() - FILE_TTL_SECONDS
     
-    # Remove from metadata
-    for file_id in expired_ids:
-        del file_metadata[file_id]
+    # Metadata expires on its own, so remove output files whose entry is gone.
+    # Only consider files older than the TTL to avoid racing in-progress jobs.
+    for entry in os.scandir(OUTPUT_DIR):
+        file_id, ext = os.path.splitext(entry.name)
+        if ext != '.mp4' or not entry.is_file():
+            continue
+        if entry.stat().st_mtime > oldest_allowed:
+            continue
+        if not metadata_store.exists(f"{METADATA_PREFIX}{file_id}"):
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                # Another worker's sweep got there first
+                continue
+            cleaned += 1
+    return cleaned
+
+def _cleanup_loop():
+    while True:
+        time.sleep(CLEANUP_INTERVAL_SECONDS)
+        try:
+            # Job records and encode cache entries are written once and never read
+            # again, the in-process store only drops them here
+            metadata_store.purge_expired()
+            cleaned = sweep_expired_outputs()
+            if cleaned:
+                app.logger.info("Removed %d expired video files", cleaned)
+        except Exception as e:
+            app.logger.error("Background cleanup failed: %s", e)
+
+# Expired outputs are swept by one daemon thread per worker instead of on request
+CLEANUP_INTERVAL_SECONDS = int(os.environ.get('VIDEO_WORKER_POLL_INTERVAL_MS', 5000)) / 1000
+threading.Thread(target=_cleanup_loop, name='output-cleanup', daemon=True).start()
+
+@app.route('/cleanup')
+def cleanup_expired_files():
+    """Clean up expired files now, without waiting for the background sweep"""
+    cleaned = sweep_expired_outputs()
     
     return jsonify({
         "cleaned": cleaned,
-        "active_files": len(file_metadata)
+        "active_files": metadata_store.count(METADATA_PREFIX)
     })
 
 
 def main():
     """Main entry point for the API server"""
-    import logging
     logging.basicConfig(level=logging.INFO)
     
     port = int(os.environ.get('PORT', 5000))
@@ -423,11 +935,18 @@ def main():
     print("Available endpoints:")
     print("- GET  /health")
     print("- POST /create_video_onestep")
+    print("- POST /create_videos_batch")
+    print("- GET  /jobs/<job_id>")
     print("- GET  /download/<file_id>")
     print("- GET  /cleanup")
     print("\n")
     
-    app.run(host='0.0.0.0', port=port)
+    # Serve with Gunicorn (multiple threaded workers) instead of the Flask dev server.
+    # Exec a fresh interpreter so the master never holds this module's threads, pools
+    # or job settings: each worker imports the app after gunicorn_conf.py has set
+    # VIDEO_WORKER_PROCESSES
+    config_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gunicorn_conf.py')
+    os.execvp(sys.executable, [sys.executable, '-m', 'gunicorn', '-c', config_path, 'video_generation_api.app:app'])
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration for the Video Generation API
+Usage: gunicorn -c gunicorn_conf.py app:app
+"""
+
+import os
+
+
+def _total_memory_bytes():
+    """Physical memory of the host, 4GB assumed if it cannot be detected"""
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        return 4 * 1024 ** 3
+
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# One worker per 2GB of RAM, between 2 and 16 workers
+workers = min(16, max(2, _total_memory_bytes() // (2 * 1024 ** 3)))
+# Recycle workers periodically to bound memory growth
+max_requests = 50
+
+# Without Redis the file metadata is per process, so every request must reach
+# the same long-lived worker for downloads to resolve
+if not os.environ.get('REDIS_HOST'):
+    workers = 1
+    max_requests = 0
+
+workers = int(os.environ.get('GUNICORN_WORKERS', workers))
+# Lets each worker split the FFmpeg concurrency budget (see job_processor.py)
+os.environ['VIDEO_WORKER_PROCESSES'] = str(workers)
+
+# Threads keep a worker responsive while FFmpeg runs in a subprocess
+worker_class = 'gthread'
+threads = 4
+
+# Long FFmpeg jobs and large base64 uploads
+timeout = 600
+# Recycled workers drain their queued jobs before exiting
+graceful_timeout = 600
+limit_request_line = 0
+
+# Downloads go through wsgi.file_wrapper, sent with sendfile(2) without touching Python
+sendfile = True
@@ -0,0 +1,123 @@
+"""
+Bounded job processor for FFmpeg work
+Jobs wait in a fixed-size queue and run on a fixed number of worker threads,
+so concurrent requests cannot spawn an unbounded number of FFmpeg processes
+"""
+
+import os
+import queue
+import uuid
+from concurrent.futures import ThreadPoolExecutor, Future
+
+
+def max_concurrent_jobs():
+    """
+    VIDEO_MAX_CONCURRENT, or one concurrent job per 2GB of RAM (1 to 16) shared between
+    worker processes. Read per JobProcessor, after Gunicorn has set VIDEO_WORKER_PROCESSES
+    """
+    configured = int(os.environ.get('VIDEO_MAX_CONCURRENT', 0))
+    if configured:
+        return configured
+    try:
+        total_memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (ValueError, OSError, AttributeError):
+        total_memory = 4 * 1024 ** 3
+    max_concurrent = min(16, max(1, total_memory // (2 * 1024 ** 3)))
+    worker_processes = int(os.environ.get('VIDEO_WORKER_PROCESSES', 1))
+    return max(1, max_concurrent // worker_processes)
+
+
+VIDEO_MAX_QUEUE = int(os.environ.get('VIDEO_MAX_QUEUE', 16))
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity (queue:full)"""
+
+
+class TranscodeJob:
+    """A unit of FFmpeg work: a callable plus its arguments"""
+
+    def __init__(self, fn, *args, job_id=None, **kwargs):
+        self.job_id = job_id or uuid.uuid4().hex
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+
+class JobProcessor:
+    """
+    Run TranscodeJobs with bounded concurrency and a bounded waiting queue
+
+    Example:
+        processor = JobProcessor(max_workers=2, max_queue=8)
+        future = processor.submit(TranscodeJob(encode, "input.mp4"))
+    """
+
+    def __init__(self, max_workers=None, max_queue=VIDEO_MAX_QUEUE, on_status=None, logger=None):
+        """
+        Args:
+            max_workers: Number of jobs allowed to run at the same time,
+                         max_concurrent_jobs() if not given
+            max_queue: Number of jobs allowed to wait for a free worker
+            on_status: Optional callback(job, status, result=None, error=None)
+                       invoked on "queued", "running", "completed" and "failed"
+            logger: Optional logger for job failures
+        """
+        if max_workers is None:
+            max_workers = max_concurrent_jobs()
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.on_status = on_status
+        self.logger = logger
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='video-job')
+
+    def submit(self, job):
+        """
+        Queue a job for execution
+
+        Returns:
+            concurrent.futures.Future resolved with the job result
+
+        Raises:
+            QueueFullError: If max_queue jobs are already waiting
+        """
+        # Record the status first so a fast worker cannot be overwritten by it
+        self._notify(job, "queued")
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._notify(job, "rejected")
+            raise QueueFullError(f"Job queue is full ({self.max_queue} jobs waiting)")
+        # Each submission pops exactly one queued job once a worker is free
+        self._executor.submit(self._run_next)
+        return job.future
+
+    def queue_depth(self):
+        """Number of jobs waiting for a free worker"""
+        return self._queue.qsize()
+
+    def shutdown(self, wait=True):
+        """Stop accepting work; with wait=True block until queued jobs finish"""
+        self._executor.shutdown(wait=wait)
+
+    def _run_next(self):
+        job = self._queue.get_nowait()
+        if not job.future.set_running_or_notify_cancel():
+            return
+        self._notify(job, "running")
+        try:
+            result = job.fn(*job.args, **job.kwargs)
+        except Exception as e:
+            if self.logger:
+                self.logger.error("Job %s failed: %s", job.job_id, e, exc_info=True)
+            self._notify(job, "failed", error=str(e))
+            job.future.set_exception(e)
+        else:
+            self._notify(job, "completed", result=result)
+            job.future.set_result(result)
+
+    def _notify(self, job, status, result=None, error=None):
+        if self.on_status:
+            self.on_status(job, status, result=result, error=error)
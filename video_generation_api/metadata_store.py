@@ -0,0 +1,123 @@
+"""
+Metadata storage for generated files
+Uses Redis hashes with native TTL when REDIS_HOST is configured,
+falls back to an in-process dictionary for single-worker deployments
+"""
+
+import os
+import time
+import threading
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+
+class RedisMetadataStore:
+    """Store each entry as a Redis hash; Redis evicts expired keys itself"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def set(self, key, mapping, ttl):
+        pipe = self.client.pipeline()
+        pipe.hset(key, mapping=mapping)
+        pipe.expire(key, ttl)
+        pipe.execute()
+
+    def get(self, key):
+        # Missing and expired keys both come back as an empty dict
+        return self.client.hgetall(key) or None
+
+    def exists(self, key):
+        return bool(self.client.exists(key))
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def count(self, prefix):
+        return sum(1 for _ in self.client.scan_iter(match=f"{prefix}*"))
+
+    def purge_expired(self):
+        # Redis evicts expired keys itself
+        return 0
+
+
+class MemoryMetadataStore:
+    """Dictionary store with lazy expiration, mirroring the Redis semantics"""
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def set(self, key, mapping, ttl):
+        # Merge fields and reset the TTL like HSET + EXPIRE
+        with self._lock:
+            fields = self._get_unlocked(key) or {}
+            fields.update(mapping)
+            self._entries[key] = (time.time() + ttl, fields)
+
+    def get(self, key):
+        with self._lock:
+            mapping = self._get_unlocked(key)
+            return dict(mapping) if mapping is not None else None
+
+    def _get_unlocked(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, mapping = entry
+        if time.time() > expires_at:
+            del self._entries[key]
+            return None
+        return mapping
+
+    def exists(self, key):
+        return self.get(key) is not None
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def count(self, prefix):
+        self.purge_expired()
+        with self._lock:
+            return sum(1 for k in self._entries if k.startswith(prefix))
+
+    def purge_expired(self):
+        """
+        Drop every expired entry, including keys that are never read again
+
+        Returns:
+            int: Number of entries removed
+        """
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._entries.items() if now > expires_at]
+            for k in expired:
+                del self._entries[k]
+            return len(expired)
+
+
+def create_metadata_store():
+    """
+    Create the metadata store for this process
+
+    Returns:
+        RedisMetadataStore if REDIS_HOST is set, MemoryMetadataStore otherwise
+    """
+    redis_host = os.environ.get('REDIS_HOST')
+    if not redis_host:
+        return MemoryMetadataStore()
+
+    if redis is None:
+        raise RuntimeError("REDIS_HOST is set but the 'redis' package is not installed")
+
+    client = redis.Redis(
+        host=redis_host,
+        port=int(os.environ.get('REDIS_PORT', 6379)),
+        password=os.environ.get('REDIS_PASSWORD') or None,
+        decode_responses=True
+    )
+    return RedisMetadataStore(client)
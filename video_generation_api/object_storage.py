@@ -0,0 +1,76 @@
+"""
+S3-compatible object storage for large inputs and outputs
+Requests may reference inputs as s3://bucket/key URLs instead of base64 payloads,
+and finished videos may be uploaded to a bucket instead of downloaded from the API
+"""
+
+import os
+from urllib.parse import urlparse
+
+try:
+    import boto3
+except ImportError:
+    boto3 = None
+
+
+def parse_s3_url(url):
+    """
+    Split an s3://bucket/key URL
+
+    Returns:
+        (bucket, key) tuple
+
+    Raises:
+        ValueError: If the URL is not an s3:// URL with a bucket and a key
+    """
+    parsed = urlparse(url)
+    key = parsed.path.lstrip('/')
+    if parsed.scheme != 's3' or not parsed.netloc or not key:
+        raise ValueError(f"Expected an s3://bucket/key URL, got {url!r}")
+    return parsed.netloc, key
+
+
+class ObjectStorage:
+    """Transfer files between the local disk and S3-compatible buckets"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def download(self, url, file_path):
+        """Stream the object at an s3:// URL straight into file_path"""
+        bucket, key = parse_s3_url(url)
+        self.client.download_file(bucket, key, file_path)
+        return file_path
+
+    def upload(self, file_path, url, expires_in):
+        """
+        Upload a finished video to an s3:// URL
+
+        Returns:
+            Presigned GET URL for the uploaded object, valid for expires_in seconds
+        """
+        bucket, key = parse_s3_url(url)
+        self.client.upload_file(file_path, bucket, key, ExtraArgs={'ContentType': 'video/mp4'})
+        return self.client.generate_presigned_url(
+            'get_object', Params={'Bucket': bucket, 'Key': key}, ExpiresIn=expires_in
+        )
+
+
+def create_object_storage():
+    """
+    Create the object storage client for this process
+
+    Credentials come from the standard AWS environment variables; S3_ENDPOINT_URL
+    points the client at an S3-compatible service instead of AWS
+
+    Returns:
+        ObjectStorage if the 'boto3' package is installed, None otherwise
+    """
+    if boto3 is None:
+        return None
+    client = boto3.client(
+        's3',
+        endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None,
+        region_name=os.environ.get('S3_REGION') or None
+    )
+    return ObjectStorage(client)